@@ -0,0 +1,68 @@
+"""
+Benchmark Book.export time per page.
+
+Usage:
+    python benchmarks/bench_export.py [--pages 10 100 500] [--repeat 3]
+"""
+
+from pathlib import Path
+import argparse
+import io
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from drawbook import Book  # noqa: E402
+
+
+def make_book(num_pages: int, illustration: str | None) -> Book:
+    """Build a synthetic book whose pages have a few sentences each."""
+    pages = [
+        f"Page {i + 1} of the story. The rocket flies past the moon. Everyone waves hello."
+        for i in range(num_pages)
+    ]
+    return Book(
+        title="The Benchmark Book",
+        pages=pages,
+        illustrations=[illustration] * num_pages,
+        title_illustration=illustration or False,
+        author="Drawbook",
+    )
+
+
+def time_export(book: Book, repeat: int) -> float:
+    """Return the best export time in seconds over `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        book.export(io.BytesIO())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        illustration = str(Path(tmp) / "illustration.png")
+        Image.new("RGB", (1024, 1024), "white").save(illustration)
+
+        print(f"{'pages':>6} {'illustrated':>12} {'total (s)':>10} {'per page (ms)':>14}")
+        for num_pages in args.pages:
+            for image in (None, illustration):
+                elapsed = time_export(make_book(num_pages, image), args.repeat)
+                print(
+                    f"{num_pages:>6} {str(image is not None):>12} "
+                    f"{elapsed:>10.3f} {1000 * elapsed / num_pages:>14.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Benchmark the hot paths of Book on synthetic books and compare them to stored baselines.
+
+Every case runs in a fresh subprocess so that its peak RSS is measured on its own.
+Illustrate runs against drawbook.testing.FakeInferenceServer, so no network access or
+Hugging Face token is needed.
+
+Usage:
+    python benchmarks/bench_suite.py                       # run and compare to baselines
+    python benchmarks/bench_suite.py --pages 10 100        # smaller books only
+    python benchmarks/bench_suite.py --cases export save_load
+    python benchmarks/bench_suite.py --save-baseline       # record new baselines
+
+Timings depend on the machine, so record baselines on the machine that runs the
+comparison (e.g. the release machine) before relying on them.
+"""
+
+from pathlib import Path
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_export import make_book  # noqa: E402
+
+CASES = ["export", "create_preview", "save_load", "illustrate"]
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines.json"
+
+# Cases faster than this are too noisy for their speed to be compared
+MIN_COMPARABLE_SECONDS = 0.05
+
+
+def peak_rss_mb() -> float | None:
+    """Return the peak resident set size of this process in MiB, if it can be measured."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def warm_up() -> None:
+    """Pay one-off import and setup costs before anything is timed."""
+    import importlib
+    from drawbook.slides import get_content_slide_template
+
+    importlib.import_module("requests")
+    # huggingface_hub loads its inference clients lazily on first attribute access
+    importlib.import_module("huggingface_hub").InferenceClient
+    get_content_slide_template()
+
+
+def run_case(case: str, num_pages: int, illustrated: bool, latency: float) -> dict:
+    """Run one benchmark case in this process and return its measurements."""
+    from PIL import Image
+    from drawbook import Book
+
+    warm_up()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        illustration = None
+        if illustrated:
+            illustration = str(tmp / "illustration.png")
+            Image.new("RGB", (1024, 1024), "white").save(illustration)
+        book = make_book(num_pages, illustration)
+        output_bytes = None
+
+        if case == "export":
+            buffer = io.BytesIO()
+            start = time.perf_counter()
+            book.export(buffer)
+            elapsed = time.perf_counter() - start
+            output_bytes = buffer.tell()
+        elif case == "create_preview":
+            start = time.perf_counter()
+            book.create_preview()
+            elapsed = time.perf_counter() - start
+        elif case == "save_load":
+            path = tmp / "book.json"
+            start = time.perf_counter()
+            book._write_json(path)
+            Book.load(path)
+            elapsed = time.perf_counter() - start
+            output_bytes = path.stat().st_size
+        elif case == "illustrate":
+            from drawbook.testing import FakeInferenceServer
+
+            with FakeInferenceServer(chat_latency=latency, image_latency=latency) as server:
+                book = Book(
+                    title=book.title,
+                    pages=book.pages,
+                    prompt_backend=server.prompt_backend(),
+                    image_backend=server.image_backend(),
+                    prompt_cache=False,
+                )
+                save_dir = tmp / "images"
+                start = time.perf_counter()
+                book.illustrate(save_dir=save_dir, max_workers=8, image_cache=False)
+                elapsed = time.perf_counter() - start
+            output_bytes = sum(f.stat().st_size for f in save_dir.iterdir())
+        else:
+            raise ValueError(f"Unknown benchmark case: {case}")
+
+    return {
+        "seconds": elapsed,
+        "pages_per_second": num_pages / elapsed if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "output_bytes": output_bytes,
+    }
+
+
+def run_isolated(case: str, num_pages: int, illustrated: bool, latency: float) -> dict:
+    """Run one benchmark case in a subprocess and return its measurements."""
+    command = [
+        sys.executable,
+        __file__,
+        "--run-case",
+        case,
+        str(num_pages),
+        str(int(illustrated)),
+        str(latency),
+    ]
+    # Keep the subprocess's caches and progress output away from the results
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env["DRAWBOOK_CACHE_DIR"] = cache_dir
+        output = subprocess.run(
+            command, capture_output=True, text=True, check=True, env=env
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def case_key(case: str, num_pages: int, illustrated: bool) -> str:
+    return f"{case}/{num_pages}/{'illustrated' if illustrated else 'text'}"
+
+
+def compare(result: dict, baseline: dict | None, tolerance: float) -> str:
+    """Return a status comparing a result to its baseline: ok, SLOWER, BIGGER or new."""
+    if not baseline:
+        return "new"
+    problems = []
+    if (
+        baseline["seconds"] >= MIN_COMPARABLE_SECONDS
+        and result["pages_per_second"] < baseline["pages_per_second"] * (1 - tolerance)
+    ):
+        problems.append("SLOWER")
+    if (
+        result["peak_rss_mb"]
+        and baseline.get("peak_rss_mb")
+        and result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance)
+    ):
+        problems.append("BIGGER")
+    return ",".join(problems) or "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Seconds every fake inference request takes in the illustrate case.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative slowdown or memory growth reported as a regression.",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--run-case", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        case, num_pages, illustrated, latency = args.run_case
+        result = run_case(case, int(num_pages), illustrated == "1", float(latency))
+        print(json.dumps(result))
+        return
+
+    baselines = {}
+    if args.baseline.exists():
+        baselines = json.loads(args.baseline.read_text())
+
+    print(
+        f"{'case':<34} {'seconds':>9} {'pages/s':>10} {'peak MiB':>9} "
+        f"{'output KiB':>11} {'baseline p/s':>13}  status"
+    )
+    results, regressions = {}, 0
+    for case in args.cases:
+        for num_pages in args.pages:
+            # Illustrate skips illustrated pages, so it only runs on text-only books
+            for illustrated in (False,) if case == "illustrate" else (False, True):
+                key = case_key(case, num_pages, illustrated)
+                result = run_isolated(case, num_pages, illustrated, args.latency)
+                results[key] = result
+                baseline = baselines.get(key)
+                status = compare(result, baseline, args.tolerance)
+                regressions += status not in ("ok", "new")
+                output_kib = (
+                    f"{result['output_bytes'] / 1024:.0f}"
+                    if result["output_bytes"] is not None
+                    else "-"
+                )
+                print(
+                    f"{key:<34} {result['seconds']:>9.3f} "
+                    f"{result['pages_per_second']:>10.1f} "
+                    f"{result['peak_rss_mb'] or 0:>9.1f} {output_kib:>11} "
+                    f"{baseline['pages_per_second'] if baseline else 0:>13.1f}  {status}"
+                )
+
+    if args.save_baseline:
+        import platform
+
+        baselines.update(results)
+        baselines["_machine"] = {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "python": platform.python_version(),
+        }
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines saved to {args.baseline}")
+    elif regressions:
+        print(f"{regressions} regression(s) beyond {args.tolerance:.0%} of the baselines")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
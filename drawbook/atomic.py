@@ -0,0 +1,39 @@
+"""
+Atomic file writes, so that readers in this or other processes see either the old
+file or the complete new one, never a partly written file.
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+import os
+import tempfile
+
+
+@contextmanager
+def atomic_write(path: str | Path, mode: str = "wb", encoding: str | None = None):
+    """
+    Open a temporary file next to `path` for writing, and move it over `path` once
+    the body of the `with` statement succeeds. If the body raises, the temporary file
+    is removed and `path` is left untouched.
+
+    Args:
+        path: Path of the file to write. Its directory must exist.
+        mode: "wb" for binary files or "w" for text files.
+        encoding: Encoding of text files.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def write_atomic(path: str | Path, chunks) -> None:
+    """Atomically write an iterable of byte strings to `path`."""
+    with atomic_write(path) as f:
+        for chunk in chunks:
+            f.write(chunk)
@@ -0,0 +1,250 @@
+"""
+Backends for the two inference steps: turning page text into an illustration prompt
+(a chat model) and turning a prompt into an image (a text-to-image model).
+
+By default both go to the Hugging Face Inference API. Either can be pointed at any
+server exposing the same API, e.g. a self-hosted inference cluster or the fake
+server in `drawbook.testing`, by giving it a `base_url`:
+
+    set_default_backends(
+        prompt_backend=InferenceAPIPromptBackend(base_url="http://tgi.internal:8080"),
+        image_backend=InferenceAPIImageBackend(base_url="http://images.internal/models"),
+    )
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import List
+
+from . import ratelimit
+from .session import RetryPolicy, server_delay
+
+
+PROMPT_MODEL = "Qwen/Qwen2.5-72B-Instruct"
+
+IMAGE_API_URL = "https://api-inference.huggingface.co/models"
+
+
+class PromptBackend(ABC):
+    """Extracts illustration prompts with a chat model. Subclasses implement `chat` and `achat`."""
+
+    # Cached prompts are keyed by the model and the server it runs on, so changing
+    # either doesn't reuse old prompts. None is the Hugging Face Inference API.
+    model: str = PROMPT_MODEL
+    base_url: str | None = None
+
+    @abstractmethod
+    def chat(self, messages: List[dict], max_tokens: int = 500) -> str:
+        """Send a chat completion request and return the stripped reply."""
+
+    @abstractmethod
+    async def achat(self, messages: List[dict], max_tokens: int = 500) -> str:
+        """The coroutine version of `chat`."""
+
+
+class ImageBackend(ABC):
+    """
+    Describes the HTTP requests that generate an image from a prompt. Subclasses
+    implement `url`; the other methods describe an unauthenticated Inference API request.
+    """
+
+    @abstractmethod
+    def url(self, model: str) -> str:
+        """Return the URL image generation requests for `model` (a LoRA) are posted to."""
+
+    def headers(self) -> dict:
+        """Return the headers of image generation requests."""
+        return {}
+
+    def payload(self, prompt: str) -> dict:
+        """Return the JSON body of the request generating an image for `prompt`."""
+        return {"inputs": prompt}
+
+    def missing_credentials(self) -> str | None:
+        """Return a message explaining which credentials are missing, or None."""
+        return None
+
+
+def _hf_token(token: str | None) -> str | None:
+    if token is not None:
+        return token
+    import huggingface_hub
+
+    return huggingface_hub.get_token()
+
+
+class InferenceAPIPromptBackend(PromptBackend):
+    """
+    Chat completions through `huggingface_hub`'s inference clients, against the
+    Hugging Face Inference API or any server with an OpenAI-compatible chat API.
+    """
+
+    def __init__(
+        self,
+        model: str = PROMPT_MODEL,
+        base_url: str | None = None,
+        token: str | None = None,
+        client=None,
+        async_client=None,
+    ):
+        """
+        Args:
+            model: The chat model to use.
+            base_url: Optional URL of a compatible server to send requests to instead
+                      of the Hugging Face Inference API.
+            token: Optional API token. Defaults to the locally saved Hugging Face token.
+            client: Optional `InferenceClient` to use instead of creating one.
+            async_client: Optional `AsyncInferenceClient` to use instead of creating one
+                          per request. It is not closed.
+        """
+        self.model = model
+        self.base_url = base_url
+        self.token = token
+        self._client = client
+        self._async_client = async_client
+
+    def _client_kwargs(self) -> dict:
+        kwargs = {}
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        if self.token:
+            kwargs["api_key"] = self.token
+        return kwargs
+
+    @property
+    def client(self):
+        """The `InferenceClient`, created on first use."""
+        if self._client is None:
+            from huggingface_hub import InferenceClient
+
+            self._client = InferenceClient(**self._client_kwargs())
+        return self._client
+
+    def _open_async_client(self):
+        """
+        Return an async context manager giving the `AsyncInferenceClient` to send a
+        request with. These clients are bound to the event loop they are first used in
+        and only release streamed responses when closed, so unless one was passed in,
+        each request gets its own client that is closed afterwards.
+        """
+        if self._async_client is not None:
+            return nullcontext(self._async_client)
+        from huggingface_hub import AsyncInferenceClient
+
+        return AsyncInferenceClient(**self._client_kwargs())
+
+    @staticmethod
+    def _pause_for(e: Exception) -> float | None:
+        """Return how long to hold back other requests after `e`, if it was a 429."""
+        response = getattr(e, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            # Hold back the other workers instead of letting them all hit the limit
+            return server_delay(response) or RetryPolicy().backoff_base
+        return None
+
+    def chat(self, messages: List[dict], max_tokens: int = 500) -> str:
+        ratelimit.acquire("chat")
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+        except Exception as e:
+            pause = self._pause_for(e)
+            if pause:
+                ratelimit.pause("chat", pause)
+            raise
+
+        response = ""
+        for chunk in stream:
+            if chunk.choices[0].delta.content is not None:
+                response += chunk.choices[0].delta.content
+
+        return response.strip()
+
+    async def achat(self, messages: List[dict], max_tokens: int = 500) -> str:
+        await ratelimit.aacquire("chat")
+        async with self._open_async_client() as client:
+            try:
+                stream = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+            except Exception as e:
+                pause = self._pause_for(e)
+                if pause:
+                    await ratelimit.apause("chat", pause)
+                raise
+
+            response = ""
+            async for chunk in stream:
+                if chunk.choices[0].delta.content is not None:
+                    response += chunk.choices[0].delta.content
+
+        return response.strip()
+
+
+class InferenceAPIImageBackend(ImageBackend):
+    """
+    Text-to-image requests in the format of the Hugging Face Inference API, sent to
+    the API itself or to any server accepting the same requests.
+    """
+
+    def __init__(self, base_url: str = IMAGE_API_URL, token: str | None = None):
+        """
+        Args:
+            base_url: URL that the model name is appended to. Defaults to the Hugging
+                      Face Inference API.
+            token: Optional API token. Defaults to the locally saved Hugging Face token.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+
+    def url(self, model: str) -> str:
+        return f"{self.base_url}/{model}"
+
+    def headers(self) -> dict:
+        token = _hf_token(self.token)
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    def missing_credentials(self) -> str | None:
+        if self.base_url == IMAGE_API_URL and not _hf_token(self.token):
+            return "No Hugging Face token found. Please login using `huggingface-cli login`"
+        return None
+
+
+_default_prompt_backend = None
+_default_image_backend = None
+
+
+def set_default_backends(
+    prompt_backend: PromptBackend | None = None,
+    image_backend: ImageBackend | None = None,
+) -> None:
+    """
+    Set the backends used by books that weren't given their own. Passing None
+    restores the Hugging Face Inference API backend.
+    """
+    global _default_prompt_backend, _default_image_backend
+    _default_prompt_backend = prompt_backend
+    _default_image_backend = image_backend
+
+
+def get_prompt_backend() -> PromptBackend:
+    """Return the default prompt backend."""
+    global _default_prompt_backend
+    if _default_prompt_backend is None:
+        _default_prompt_backend = InferenceAPIPromptBackend()
+    return _default_prompt_backend
+
+
+def get_image_backend() -> ImageBackend:
+    """Return the default image backend."""
+    global _default_image_backend
+    if _default_image_backend is None:
+        _default_image_backend = InferenceAPIImageBackend()
+    return _default_image_backend
@@ -0,0 +1,221 @@
+"""
+Illustrate and export many books at once through shared worker pools.
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, List
+import hashlib
+import json
+import threading
+import traceback
+
+from .atomic import atomic_write
+
+
+def find_books(source: str | Path | Iterable[str | Path]) -> List[Path]:
+    """
+    Return the resolved paths of the book JSON files to process.
+
+    Args:
+        source: A directory (every `*.json` file in it is a book), a text file listing
+                one book path per line (relative paths are resolved against the text
+                file's directory), or an iterable of book paths.
+    """
+    if isinstance(source, (str, Path)):
+        source = Path(source)
+        if source.is_dir():
+            return sorted(path.resolve() for path in source.glob("*.json") if path.is_file())
+        if not source.exists():
+            raise FileNotFoundError(f"No book directory or manifest found at: {source}")
+        lines = source.read_text(encoding="utf-8").splitlines()
+        return [
+            (source.parent / line.strip()).resolve()
+            for line in lines
+            if line.strip() and not line.strip().startswith("#")
+        ]
+    return [Path(path).resolve() for path in source]
+
+
+class JobManifest:
+    """
+    Records the status of every book in a batch run in a JSON file, which is
+    rewritten atomically whenever a book changes status. Books already marked "done"
+    are skipped when a batch is run again with the same manifest. Books marked
+    "incomplete" (exported with pages that could not be illustrated) or "failed"
+    are processed again.
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Args:
+            path: Path of the manifest file. It is loaded if it already exists.
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.books = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.books = json.load(f)["books"]
+
+    def status(self, source: Path) -> str | None:
+        """Return the status recorded for a book, or None if it hasn't been seen."""
+        return self.books.get(str(source), {}).get("status")
+
+    def update(self, source: Path, **fields) -> None:
+        """Update the entry of a book and write the manifest."""
+        with self._lock:
+            entry = self.books.setdefault(str(source), {"source": str(source)})
+            entry.update(fields)
+            entry["updated"] = datetime.now(timezone.utc).isoformat()
+            self._write()
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(self.path, "w", encoding="utf-8") as f:
+            json.dump({"books": self.books}, f, indent=2, ensure_ascii=False)
+
+    def assign_folders(self, sources: List[Path]) -> dict:
+        """
+        Return the name of the output folder of every book and record it. Books keep
+        the folder recorded by earlier runs. New books get their file name, plus a hash
+        of their path if another book already has or wants that name.
+        """
+        with self._lock:
+            stems = Counter(source.stem for source in sources)
+            taken = {entry.get("folder") for entry in self.books.values()}
+            folders = {}
+            for source in sources:
+                entry = self.books.setdefault(
+                    str(source), {"source": str(source), "status": "pending"}
+                )
+                if not entry.get("folder"):
+                    folder = source.stem
+                    if stems[folder] > 1 or folder in taken:
+                        # Books with the same file name in different folders mustn't share outputs
+                        path_hash = hashlib.sha256(str(source).encode("utf-8")).hexdigest()
+                        folder = f"{folder}-{path_hash[:8]}"
+                    entry["folder"] = folder
+                    taken.add(folder)
+                folders[source] = entry["folder"]
+            self._write()
+        return folders
+
+    def summary(self) -> dict:
+        """Return the number of books in each status."""
+        counts = {}
+        for entry in self.books.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+
+def run_batch(
+    source: str | Path | Iterable[str | Path],
+    output_dir: str | Path,
+    max_workers: int = 8,
+    max_books: int = 4,
+    formats: Iterable[str] = ("pptx",),
+    illustrate: bool = True,
+    manifest: str | Path | None = None,
+    **illustrate_kwargs,
+) -> JobManifest:
+    """
+    Illustrate and export many books. Pages from every book share one pool of
+    `max_workers` threads, so the number of concurrent requests to the inference
+    API stays bounded however many books are in flight.
+
+    Each book gets a folder in `output_dir` holding its images, a checkpoint of the
+    illustrated book (`book.json`) and its exports. The folder is named after the
+    book's file, plus a hash of its path when several books have the same file name,
+    and recorded in the manifest so that later runs reuse it. Interrupted runs resume
+    from the checkpoints and skip books the manifest records as done. Books with pages that
+    could not be illustrated are recorded as incomplete, and running the batch again
+    retries just those pages.
+
+    Args:
+        source: Book JSON files, see `find_books`.
+        output_dir: Directory the outputs of every book are written to.
+        max_workers: Maximum number of pages illustrated at the same time, across all books.
+        max_books: Maximum number of books loaded, illustrated and exported at the same time.
+        formats: Export formats, any of "pptx", "pdf" and "drawbook" (a book bundle).
+        illustrate: If False, books are only exported.
+        manifest: Path of the job manifest. Defaults to `manifest.json` in `output_dir`.
+        **illustrate_kwargs: Extra options passed on to `Book.illustrate`.
+
+    Returns:
+        The job manifest with the status of every book.
+    """
+    from .core import Book
+
+    output_dir = Path(output_dir)
+    formats = list(formats)
+    unknown = set(formats) - {"pptx", "pdf", "drawbook"}
+    if unknown:
+        raise ValueError(f"Unsupported export formats: {sorted(unknown)}")
+
+    # A book listed twice is only processed once
+    books = list(dict.fromkeys(find_books(source)))
+    job_manifest = JobManifest(manifest or output_dir / "manifest.json")
+    folders = job_manifest.assign_folders(books)
+    pending = [path for path in books if job_manifest.status(path) != "done"]
+    print(f"Processing {len(pending)} of {len(books)} book(s) into {output_dir}")
+
+    def process(path: Path, page_executor: ThreadPoolExecutor) -> None:
+        book_dir = output_dir / folders[path]
+        checkpoint = book_dir / "book.json"
+        try:
+            job_manifest.update(path, status="illustrating", error=None)
+            if illustrate:
+                book = Book.load(path)
+                book.illustrate(
+                    save_dir=book_dir / "images",
+                    checkpoint=checkpoint,
+                    executor=page_executor,
+                    **illustrate_kwargs,
+                )
+            else:
+                book = Book.load(checkpoint if checkpoint.exists() else path)
+
+            job_manifest.update(path, status="exporting")
+            outputs = []
+            for export_format in formats:
+                if export_format == "pptx":
+                    outputs.append(book.export(book_dir / f"{path.stem}.pptx"))
+                elif export_format == "pdf":
+                    outputs.append(book.export_pdf(book_dir / f"{path.stem}.pdf"))
+                else:
+                    outputs.append(book.save_bundle(book_dir / f"{path.stem}.drawbook"))
+
+            missing = sum(
+                illustration is None
+                for illustration in [book.title_illustration, *book.illustrations]
+            )
+            job_manifest.update(
+                path,
+                status="incomplete" if illustrate and missing else "done",
+                outputs=[str(output) for output in outputs],
+                missing_illustrations=missing,
+            )
+        except Exception as e:
+            job_manifest.update(
+                path,
+                status="failed",
+                error=f"{type(e).__name__}: {e}",
+                traceback=traceback.format_exc(),
+            )
+            print(f"Warning: Failed to process {path}: {e}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as page_executor:
+        with ThreadPoolExecutor(max_workers=max(1, max_books)) as book_executor:
+            for path in pending:
+                job_manifest.update(path, status="pending")
+            futures = [
+                book_executor.submit(process, path, page_executor) for path in pending
+            ]
+            for future in futures:
+                future.result()
+
+    print(f"Batch finished: {job_manifest.summary()}")
+    return job_manifest
@@ -0,0 +1,132 @@
+"""
+Single-file book bundles holding the book's metadata and illustrations.
+
+A bundle is a zip archive with a `book.json` member, in the same format as
+`Book.save`, and one `images/<sha256>.<ext>` member per distinct illustration.
+Illustrations are stored uncompressed (they are already compressed images) and
+are only read from the bundle when they are needed.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+import hashlib
+import json
+import os
+import shutil
+import threading
+import zipfile
+
+from .atomic import atomic_write
+from .cache import default_cache_dir
+from .images import EXTENSIONS, sniff_format
+
+if TYPE_CHECKING:
+    from .core import Book
+
+
+BOOK_MEMBER = "book.json"
+IMAGE_PREFIX = "images/"
+
+
+def save_bundle(book: "Book", path: str | Path) -> Path:
+    """
+    Write `book` and all of its illustrations to a single bundle file. Identical
+    illustrations are stored once.
+
+    Args:
+        book: The book to save.
+        path: Where to write the bundle.
+
+    Returns:
+        The absolute path of the bundle.
+    """
+    path = Path(path).resolve()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    book_data = book._to_dict()
+    members = {}
+
+    def add_image(illustration):
+        if not isinstance(illustration, str):
+            return illustration
+        try:
+            data = book._read_illustration(illustration)
+        except OSError as e:
+            print(f"Warning: Could not add illustration {illustration} to bundle: {e}")
+            return None
+        image_format = sniff_format(data[:16]) or "png"
+        name = (
+            f"{IMAGE_PREFIX}{hashlib.sha256(data).hexdigest()}"
+            f".{EXTENSIONS.get(image_format, image_format)}"
+        )
+        members.setdefault(name, data)
+        return name
+
+    book_data["title_illustration"] = add_image(book_data["title_illustration"])
+    book_data["illustrations"] = [add_image(i) for i in book_data["illustrations"]]
+
+    with atomic_write(path) as f, zipfile.ZipFile(f, "w") as bundle:
+        bundle.writestr(
+            BOOK_MEMBER,
+            json.dumps(book_data, indent=2, ensure_ascii=False),
+            compress_type=zipfile.ZIP_DEFLATED,
+        )
+        for name, data in members.items():
+            bundle.writestr(name, data, compress_type=zipfile.ZIP_STORED)
+    return path
+
+
+class BundleReader:
+    """
+    Reads illustrations out of a bundle on demand. Extracted illustrations are
+    content-addressed, so they are shared between bundles containing the same image.
+    """
+
+    def __init__(self, path: str | Path, extract_dir: str | Path | None = None):
+        """
+        Args:
+            path: Path of the bundle.
+            extract_dir: Directory illustrations are extracted to when needed. Defaults
+                         to the `bundle-images` folder inside `default_cache_dir()`.
+        """
+        self.path = Path(path)
+        self.extract_dir = Path(extract_dir or default_cache_dir() / "bundle-images")
+        self._members = {}
+        self._lock = threading.Lock()
+
+    def read_metadata(self) -> dict:
+        """Read the book metadata, mapping illustrations to their extraction paths."""
+        with zipfile.ZipFile(self.path) as bundle:
+            book_data = json.loads(bundle.read(BOOK_MEMBER).decode("utf-8"))
+
+        def local_path(illustration):
+            if not (isinstance(illustration, str) and illustration.startswith(IMAGE_PREFIX)):
+                return illustration
+            local = str(self.extract_dir / illustration[len(IMAGE_PREFIX) :])
+            self._members[local] = illustration
+            return local
+
+        book_data["title_illustration"] = local_path(book_data["title_illustration"])
+        book_data["illustrations"] = [local_path(i) for i in book_data["illustrations"]]
+        return book_data
+
+    def owns(self, illustration: str) -> bool:
+        """Return whether `illustration` is an extraction path of this bundle."""
+        return illustration in self._members
+
+    def read(self, illustration: str) -> bytes:
+        """Return the bytes of an illustration straight from the bundle."""
+        with zipfile.ZipFile(self.path) as bundle:
+            return bundle.read(self._members[illustration])
+
+    def extract(self, illustration: str) -> str:
+        """Extract an illustration if it hasn't been already, and return its path."""
+        if os.path.exists(illustration):
+            return illustration
+        with self._lock:
+            if os.path.exists(illustration):
+                return illustration
+            self.extract_dir.mkdir(parents=True, exist_ok=True)
+            with atomic_write(illustration) as f, zipfile.ZipFile(self.path) as bundle:
+                with bundle.open(self._members[illustration]) as member:
+                    shutil.copyfileobj(member, f)
+        return illustration
@@ -0,0 +1,234 @@
+"""
+Persistent caches shared across books and processes.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+
+from .atomic import atomic_write
+
+
+def default_cache_dir() -> Path:
+    """
+    Return the root directory for drawbook's caches. This is `$DRAWBOOK_CACHE_DIR`
+    if set, otherwise `$XDG_CACHE_HOME/drawbook` (or `~/.cache/drawbook`).
+    """
+    if os.environ.get("DRAWBOOK_CACHE_DIR"):
+        return Path(os.environ["DRAWBOOK_CACHE_DIR"])
+    xdg_cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(xdg_cache) / "drawbook"
+
+
+class ImageCache:
+    """
+    A content-addressed on-disk cache of generated illustrations.
+
+    Entries are keyed by a hash of the model (the URL of its endpoint, which names
+    the LoRA model and the server it runs on), the final image prompt and any
+    generation parameters. Writes are atomic, so several processes can share one
+    cache directory, and the least recently used entries are evicted once the
+    cache grows beyond `max_bytes`.
+    """
+
+    def __init__(
+        self, directory: str | Path | None = None, max_bytes: int = 2 * 1024**3
+    ):
+        """
+        Args:
+            directory: Directory to store cached images in. Defaults to the `images`
+                       folder inside `default_cache_dir()`.
+            max_bytes: Maximum total size of the cached images before the least
+                       recently used ones are evicted.
+        """
+        self.directory = Path(directory or default_cache_dir() / "images")
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(endpoint: str, prompt: str, params: dict | None = None) -> str:
+        """
+        Return the cache key for an image generated from `prompt` by `endpoint`, the
+        URL of the image model or another name for what produced the image.
+        """
+        payload = json.dumps(
+            {"endpoint": endpoint, "prompt": prompt, "params": params or {}}, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.img"
+
+    def get(self, key: str) -> Path | None:
+        """Return the path of the cached image for `key`, or None if it isn't cached."""
+        path = self._path(key)
+        try:
+            # Bump the modification time, which eviction uses as the last access time
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def copy_to(self, key: str, destination: str | Path) -> bool:
+        """Copy the cached image for `key` to `destination`, returning False on a miss."""
+        path = self.get(key)
+        if path is None:
+            return False
+        try:
+            shutil.copyfile(path, destination)
+        except FileNotFoundError:
+            # Evicted by another process between the lookup and the copy
+            return False
+        return True
+
+    def put(self, key: str, source: str | Path) -> Path:
+        """Atomically store a copy of the image file at `source` under `key`."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with atomic_write(self._path(key)) as f, open(source, "rb") as src:
+            shutil.copyfileobj(src, f)
+        self.evict()
+        return self._path(key)
+
+    def evict(self) -> None:
+        """Remove the least recently used images until the cache fits in `max_bytes`."""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(".img"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        except FileNotFoundError:
+            return
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            Path(path).unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every cached image."""
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+
+
+class PromptCache:
+    """
+    A persistent cache of illustration prompts extracted by the prompt model.
+
+    Entries are keyed by the model id, the server it runs on, the system prompt
+    version and a hash of the page text. Lookups go through an in-memory LRU first and then an sqlite
+    database, which can be shared by several processes.
+    """
+
+    def __init__(self, path: str | Path | None = None, max_memory_entries: int = 1024):
+        """
+        Args:
+            path: Path of the sqlite database. Defaults to `prompts.sqlite` inside
+                  `default_cache_dir()`.
+            max_memory_entries: Maximum number of prompts kept in the in-memory LRU.
+        """
+        self.path = Path(path or default_cache_dir() / "prompts.sqlite")
+        self.max_memory_entries = max_memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+
+    @staticmethod
+    def make_key(
+        model: str, system_prompt_version: str, text: str, base_url: str | None = None
+    ) -> str:
+        """
+        Return the cache key for the prompt extracted by `model` from `text`. `base_url`
+        is the server the model runs on, if it isn't the Hugging Face Inference API.
+        """
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if base_url:
+            model = f"{base_url.rstrip('/')}|{model}"
+        return f"{model}:{system_prompt_version}:{text_hash}"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS prompts (key TEXT PRIMARY KEY, prompt TEXT NOT NULL)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def _remember(self, key: str, prompt: str) -> None:
+        self._memory[key] = prompt
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str, count: bool = True) -> str | None:
+        """
+        Return the cached prompt for `key`, or None if it isn't cached. Lookups made
+        with `count=False` are left out of `stats()`.
+        """
+        with self._lock:
+            prompt = self._memory.get(key)
+            if prompt is None:
+                row = self._connect().execute(
+                    "SELECT prompt FROM prompts WHERE key = ?", (key,)
+                ).fetchone()
+                prompt = row[0] if row else None
+            if prompt is None:
+                self.misses += count
+                return None
+            self.hits += count
+            self._remember(key, prompt)
+            return prompt
+
+    def put(self, key: str, prompt: str) -> None:
+        """Store `prompt` under `key`."""
+        with self._lock:
+            self._remember(key, prompt)
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO prompts (key, prompt) VALUES (?, ?)",
+                (key, prompt),
+            )
+            connection.commit()
+
+    def stats(self) -> dict:
+        """Return the number of cache hits and misses seen by this process."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """Close the database connection. It is reopened on the next lookup."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_prompt_cache = None
+_prompt_cache_lock = threading.Lock()
+
+
+def get_prompt_cache() -> PromptCache:
+    """Return the prompt cache shared by every Book in this process."""
+    global _prompt_cache
+    with _prompt_cache_lock:
+        if _prompt_cache is None:
+            _prompt_cache = PromptCache()
+        return _prompt_cache
@@ -0,0 +1,111 @@
+"""
+Command line interface, e.g. `drawbook batch books/ output/`.
+"""
+
+from typing import List
+import argparse
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Run the `drawbook` command and return its exit code."""
+    parser = argparse.ArgumentParser(
+        prog="drawbook", description="Illustrate children's books with AI."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser(
+        "batch", help="Illustrate and export many books through shared worker pools."
+    )
+    batch.add_argument(
+        "source",
+        help="Directory of book JSON files, or a text file listing one book per line.",
+    )
+    batch.add_argument("output_dir", help="Directory to write the outputs to.")
+    batch.add_argument(
+        "--max-workers",
+        type=int,
+        default=8,
+        help="Maximum number of pages illustrated at the same time, across all books.",
+    )
+    batch.add_argument(
+        "--max-books",
+        type=int,
+        default=4,
+        help="Maximum number of books processed at the same time.",
+    )
+    batch.add_argument(
+        "--format",
+        dest="formats",
+        action="append",
+        choices=["pptx", "pdf", "drawbook"],
+        help="Export format, can be given several times. Defaults to pptx.",
+    )
+    batch.add_argument(
+        "--no-illustrate",
+        dest="illustrate",
+        action="store_false",
+        help="Only export the books, without generating missing illustrations.",
+    )
+    batch.add_argument(
+        "--image-rpm",
+        type=float,
+        help="Maximum image generation requests per minute, shared by every process on this host.",
+    )
+    batch.add_argument(
+        "--chat-rpm",
+        type=float,
+        help="Maximum prompt extraction requests per minute, shared by every process on this host.",
+    )
+    batch.add_argument(
+        "--prompt-url",
+        help="Base URL of a compatible chat completion server to extract prompts with.",
+    )
+    batch.add_argument(
+        "--image-url",
+        help="Base URL of a compatible image generation server, that model names are appended to.",
+    )
+    batch.add_argument(
+        "--coalesce-across-processes",
+        action="store_true",
+        help="Share identical prompt and image requests with other drawbook processes on this host.",
+    )
+    batch.add_argument(
+        "--manifest", help="Path of the job manifest. Defaults to OUTPUT_DIR/manifest.json."
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "batch":
+        from .batch import run_batch
+        from .backends import (
+            InferenceAPIImageBackend,
+            InferenceAPIPromptBackend,
+            set_default_backends,
+        )
+        from .ratelimit import set_rate_limit
+        from .singleflight import enable_cross_process
+
+        set_default_backends(
+            InferenceAPIPromptBackend(base_url=args.prompt_url) if args.prompt_url else None,
+            InferenceAPIImageBackend(base_url=args.image_url) if args.image_url else None,
+        )
+
+        if args.image_rpm:
+            set_rate_limit("image", args.image_rpm, shared=True)
+        if args.chat_rpm:
+            set_rate_limit("chat", args.chat_rpm, shared=True)
+        if args.coalesce_across_processes:
+            enable_cross_process()
+
+        manifest = run_batch(
+            args.source,
+            args.output_dir,
+            max_workers=args.max_workers,
+            max_books=args.max_books,
+            formats=args.formats or ["pptx"],
+            illustrate=args.illustrate,
+            manifest=args.manifest,
+        )
+        summary = manifest.summary()
+        return 1 if summary.get("failed") or summary.get("incomplete") else 0
+    return 0
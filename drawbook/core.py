@@ -2,25 +2,113 @@
 Core functionality for the drawbook library.
 """
 
+# Heavy dependencies (gradio, huggingface_hub, pptx, requests, tqdm and PIL) are
+# imported inside the methods that use them, so that `import drawbook` stays fast
+# for code that only needs to save, load or export books.
 from pathlib import Path
-from typing import List, Literal
+from typing import TYPE_CHECKING, BinaryIO, List, Literal
 import tempfile
 import io
-import requests
+import os
+import shutil
+import sys
 import warnings
-from tqdm import tqdm
-from PIL import Image
-import huggingface_hub
-from pptx import Presentation
-from pptx.util import Inches
-from pptx.enum.text import PP_ALIGN
-from pptx.enum.shapes import MSO_SHAPE
-from pptx.dml.color import RGBColor
-from huggingface_hub import InferenceClient
-from PIL import ImageDraw, ImageFont
-import gradio as gr
-import textwrap
 import json
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+import hashlib
+import time
+from . import metrics
+from .atomic import atomic_write
+from .bundle import BundleReader, save_bundle
+from .cache import ImageCache, PromptCache, get_prompt_cache
+from .images import (
+    EXTENSIONS,
+    _optimized_format,
+    normalize_format,
+    optimize_image,
+    save_image_bytes,
+    save_response_image,
+)
+from .pdf import COMPRESSIONS as PDF_COMPRESSIONS, PDFWriter
+from .render import NATIVE_DPI, PAGE_HEIGHT, PAGE_WIDTH, render_page, render_pages
+from .backends import (
+    ImageBackend,
+    InferenceAPIPromptBackend,
+    PromptBackend,
+    get_image_backend,
+    get_prompt_backend,
+)
+from .session import RetryPolicy, apost_with_retry, post_with_retry
+from .singleflight import get_single_flight
+from .slides import STOP_WORDS, get_content_slide_template
+from .store import PreviewStore
+
+if TYPE_CHECKING:
+    import asyncio
+    import httpx
+
+
+SYSTEM_PROMPT = """You are a helpful assistant that converts children's book text into illustration prompts. 
+        Extract a key object along with its description that could be used to illustrate the page. 
+        Replace any proper names with more generic versions.
+        
+        For example:
+        If the text is: "Mustafa loves his silver cybertruck. One day, his cybertruck starts to glow, grow, and zoom up into the sky"
+        You should return: "A silver cybertruck zooming into the sky"
+        
+        If the text is: "Up, up, up goes Mustafa in his special cybertruck. He waves bye-bye to his house as it gets tiny down below"
+        You should return: "A boy in the sky waving bye"
+        """
+
+# Cached prompts are invalidated automatically whenever the system prompt changes
+SYSTEM_PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+
+def _parse_prompt_list(response: str, expected: int) -> List[str] | None:
+    """Parse a JSON array of `expected` prompts out of a model reply, or return None."""
+    start, end = response.find("["), response.rfind("]")
+    if start == -1 or end < start:
+        return None
+    try:
+        prompts = json.loads(response[start : end + 1])
+    except ValueError:
+        return None
+    if (
+        not isinstance(prompts, list)
+        or len(prompts) != expected
+        or not all(isinstance(prompt, str) and prompt.strip() for prompt in prompts)
+    ):
+        return None
+    return [prompt.strip() for prompt in prompts]
+
+
+class _IllustrationError(Exception):
+    """Raised when the image API returns an unsuccessful response for a page."""
+
+
+@dataclass
+class _IllustrationJob:
+    """The settings shared by every page of one `illustrate` or `aillustrate` call."""
+
+    api_url: str
+    headers: dict
+    save_dir: Path
+    image_cache: ImageCache | None
+    retry_policy: RetryPolicy | None
+    image_format: str
+    image_size: tuple[int, int] | None
+    verbose: bool
+
+    def retry_logger(self, task_name: str, log: List[str]):
+        """Return the `on_retry` callback that logs the retries of a page."""
+
+        def on_retry(attempt: int, delay: float, reason: str) -> None:
+            if self.verbose:
+                log.append(f"Retrying {task_name} in {delay:.1f}s ({reason})")
+
+        return on_retry
 
 
 class Book:
@@ -36,6 +124,9 @@ class Book:
         author: str | None = None,
         illustration_prompts: List[str | None] = None,
         title_illustration_prompt: str | None = None,
+        prompt_cache: PromptCache | bool = True,
+        prompt_backend: PromptBackend | None = None,
+        image_backend: ImageBackend | None = None,
     ):
         """
         Initialize a new Book.
@@ -49,6 +140,12 @@ class Book:
             author: The book's author name
             illustration_prompts: Optional list of custom prompts for page illustrations
             title_illustration_prompt: Optional custom prompt for title illustration
+            prompt_cache: Cache of prompts extracted by the prompt model. True uses the
+                         cache shared by every book, False disables caching.
+            prompt_backend: Optional backend extracting illustration prompts from the
+                         page text. Defaults to the Hugging Face Inference API.
+            image_backend: Optional backend generating illustrations from prompts.
+                         Defaults to the Hugging Face Inference API.
         """
         self.title = title
         self.pages = pages or []
@@ -58,8 +155,18 @@ class Book:
         self.author = author
         self.illustration_prompts = illustration_prompts or []
         self.title_illustration_prompt = title_illustration_prompt
-        self.client = InferenceClient()
-        self.page_previews = []
+        self._prompt_backend = prompt_backend
+        self._image_backend = image_backend
+        self.prompt_cache = (
+            get_prompt_cache() if prompt_cache is True else prompt_cache or None
+        )
+        # Previews beyond the most recently used few are spilled to disk
+        self.page_previews = PreviewStore()
+        # Set when the book is loaded from a bundle, whose images are read lazily
+        self._bundle = None
+        self._page_states = {}
+        self._page_versions = {}
+        self._rendered_versions = {}
 
         # Ensure illustrations list matches pages length
         while len(self.illustrations) < len(self.pages):
@@ -69,48 +176,230 @@ class Book:
         while len(self.illustration_prompts) < len(self.pages):
             self.illustration_prompts.append(None)
 
-    def _get_illustration_prompt(self, text: str) -> str:
-        """Get an illustration prompt from the text using Qwen."""
-        system_prompt = """You are a helpful assistant that converts children's book text into illustration prompts. 
-        Extract a key object along with its description that could be used to illustrate the page. 
-        Replace any proper names with more generic versions.
-        
-        For example:
-        If the text is: "Mustafa loves his silver cybertruck. One day, his cybertruck starts to glow, grow, and zoom up into the sky"
-        You should return: "A silver cybertruck zooming into the sky"
-        
-        If the text is: "Up, up, up goes Mustafa in his special cybertruck. He waves bye-bye to his house as it gets tiny down below"
-        You should return: "A boy in the sky waving bye"
-        """
+    @property
+    def prompt_backend(self) -> PromptBackend:
+        """The backend extracting illustration prompts. Defaults to `get_prompt_backend()`."""
+        return self._prompt_backend or get_prompt_backend()
+
+    @prompt_backend.setter
+    def prompt_backend(self, backend: PromptBackend | None) -> None:
+        self._prompt_backend = backend
 
-        user_prompt = f"""This is the text of a page in a children's book. From this text, extract a key object along with its description that could be used to illustrate this page. Replace any proper names with more generic versions.
+    @property
+    def image_backend(self) -> ImageBackend:
+        """The backend generating illustrations. Defaults to `get_image_backend()`."""
+        return self._image_backend or get_image_backend()
+
+    @image_backend.setter
+    def image_backend(self, backend: ImageBackend | None) -> None:
+        self._image_backend = backend
+
+    @property
+    def client(self):
+        """The Hugging Face InferenceClient of the prompt backend, created on first use."""
+        return self.prompt_backend.client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._prompt_backend = InferenceAPIPromptBackend(client=client)
+
+    def _chat(self, user_prompt: str, max_tokens: int = 500, **attributes) -> str:
+        """
+        Send a single chat completion request to the prompt model and return the reply.
+        `attributes` are added to the `prompt.chat` event, e.g. the page the request is for.
+        """
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ]
+        backend = self.prompt_backend
+        with metrics.span(
+            "prompt.chat", model=backend.model, max_tokens=max_tokens, **attributes
+        ) as attributes:
+            reply = backend.chat(messages, max_tokens=max_tokens)
+            attributes["chars"] = len(reply)
+        return reply
+
+    @staticmethod
+    def _page_prompt_request(text: str) -> str:
+        """Return the message asking the prompt model for the illustration prompt of a page."""
+        return f"""This is the text of a page in a children's book. From this text, extract a key object along with its description that could be used to illustrate this page. Replace any proper names with more generic versions.
 
 Text: {text}
 
 Return ONLY the illustration description, nothing else."""
 
+    def _prompt_key(self, text: str) -> str:
+        backend = self.prompt_backend
+        return PromptCache.make_key(
+            backend.model, SYSTEM_PROMPT_VERSION, text, base_url=backend.base_url
+        )
+
+    def _cached_illustration_prompt(self, text: str, count: bool = True) -> str | None:
+        if not self.prompt_cache:
+            return None
+        cached = self.prompt_cache.get(self._prompt_key(text), count=count)
+        if cached is not None:
+            metrics.emit("prompt.cache_hit")
+        return cached
+
+    def _cache_illustration_prompt(self, text: str, prompt: str) -> None:
+        if self.prompt_cache and prompt:
+            self.prompt_cache.put(self._prompt_key(text), prompt)
+
+    @staticmethod
+    def _prompt_fallback(text: str) -> str:
+        """Warn that the prompt model could not be reached and use the page text as the prompt."""
+        msg = "Could not access Hugging Face Inference API, make sure that you are logged in locally to your Hugging Face account"
+        if "gradio" in sys.modules:
+            # Shows the warning in the UI during a Gradio event, and calls warnings.warn otherwise
+            sys.modules["gradio"].Warning(msg)
+        else:
+            warnings.warn(msg)
+        return text
+
+    def _get_illustration_prompt(self, text: str, page: str | None = None) -> str:
+        """Get an illustration prompt from the text using Qwen. `page` names the page in metrics."""
+        cached = self._cached_illustration_prompt(text)
+        if cached is not None:
+            return cached
+
+        def extract() -> str:
+            prompt = self._chat(self._page_prompt_request(text), page=page)
+            self._cache_illustration_prompt(text, prompt)
+            return prompt
+
+        # Pages with the same text that are illustrated at the same time share one request.
+        # The lookup above already counted the miss, so re-checks don't count again.
+        try:
+            return get_single_flight("prompt").do(
+                self._prompt_key(text),
+                extract,
+                check=lambda: self._cached_illustration_prompt(text, count=False),
+            )
+        except Exception:
+            return self._prompt_fallback(text)
+
+    async def _achat(self, user_prompt: str, max_tokens: int = 500, **attributes) -> str:
+        """The coroutine version of `_chat`."""
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt},
         ]
+        backend = self.prompt_backend
+        with metrics.span(
+            "prompt.chat", model=backend.model, max_tokens=max_tokens, **attributes
+        ) as attributes:
+            reply = await backend.achat(messages, max_tokens=max_tokens)
+            attributes["chars"] = len(reply)
+        return reply
+
+    async def aget_illustration_prompt(self, text: str, page: str | None = None) -> str:
+        """
+        The coroutine version of `_get_illustration_prompt`: get an illustration prompt
+        from the text of a page without blocking the event loop.
+
+        Args:
+            text: The text of the page.
+            page: Optional name of the page, e.g. "page_3", recorded in metrics events.
+
+        Returns:
+            The illustration prompt, or `text` itself if the prompt model could not be reached.
+        """
+        import asyncio
+
+        # The prompt cache is a sqlite database, so it is read and written off the loop
+        cached = await asyncio.to_thread(self._cached_illustration_prompt, text)
+        if cached is not None:
+            return cached
+
+        async def extract() -> str:
+            prompt = await self._achat(self._page_prompt_request(text), page=page)
+            await asyncio.to_thread(self._cache_illustration_prompt, text, prompt)
+            return prompt
 
         try:
-            stream = self.client.chat.completions.create(
-                model="Qwen/Qwen2.5-72B-Instruct",
-                messages=messages,
-                max_tokens=500,
-                stream=True,
+            return await get_single_flight("prompt").ado(self._prompt_key(text), extract)
+        except Exception:
+            return self._prompt_fallback(text)
+
+    def _get_illustration_prompts(
+        self, texts: List[str], batch_size: int = 20
+    ) -> List[str]:
+        """
+        Get illustration prompts for several texts, sending up to `batch_size` texts
+        per request to Qwen. Texts whose prompt is already cached are not sent. Falls
+        back to one request per text for any batch whose reply cannot be parsed.
+        """
+        prompts = {}
+        for text in texts:
+            cached = self._cached_illustration_prompt(text)
+            if cached is not None:
+                prompts[text] = cached
+        # Repeated texts, such as refrains, only need to be sent once
+        pending = list(dict.fromkeys(text for text in texts if text not in prompts))
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            if len(batch) == 1:
+                prompts[batch[0]] = self._get_illustration_prompt(batch[0])
+                continue
+
+            numbered = "\n\n".join(
+                f"Page {i + 1}: {text}" for i, text in enumerate(batch)
             )
+            user_prompt = f"""These are the texts of {len(batch)} pages in a children's book. For each page, extract a key object along with its description that could be used to illustrate that page. Replace any proper names with more generic versions.
 
-            response = ""
-            for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    response += chunk.choices[0].delta.content
+{numbered}
 
-            return response.strip()
-        except Exception:
-            gr.warning("Could not access Hugging Face Inference API, make sure that you are logged in locally to your Hugging Face account")
-            return text            
+Return ONLY a JSON array of {len(batch)} strings, one illustration description per page, in the same order as the pages, nothing else."""
+
+            try:
+                batch_prompts = _parse_prompt_list(
+                    self._chat(user_prompt, max_tokens=150 * len(batch), pages=len(batch)),
+                    len(batch),
+                )
+            except Exception:
+                batch_prompts = None
+
+            if batch_prompts is None:
+                batch_prompts = [self._get_illustration_prompt(text) for text in batch]
+            else:
+                for text, prompt in zip(batch, batch_prompts):
+                    self._cache_illustration_prompt(text, prompt)
+            prompts.update(zip(batch, batch_prompts))
+
+        return [prompts[text] for text in texts]
+
+    def generate_prompts(self, batch_size: int = 20) -> None:
+        """
+        Fill in any missing title and page illustration prompts using batched
+        requests to the prompt model.
+
+        Args:
+            batch_size: Maximum number of pages to send in a single request.
+        """
+        missing = []
+        if not self.title_illustration_prompt and self.title_illustration is None:
+            missing.append((None, self.title))
+        missing.extend(
+            (i, text)
+            for i, (text, prompt, illustration) in enumerate(
+                zip(self.pages, self.illustration_prompts, self.illustrations)
+            )
+            if not prompt and illustration is None
+        )
+        if not missing:
+            return
+
+        prompts = self._get_illustration_prompts(
+            [text for _, text in missing], batch_size=batch_size
+        )
+        for (page_idx, _), prompt in zip(missing, prompts):
+            if page_idx is None:
+                self.title_illustration_prompt = prompt
+            else:
+                self.illustration_prompts[page_idx] = prompt
 
     def _get_prompt(self, illustration_prompt: str) -> str:
         if self.lora == "SebastianBodza/Flux_Aquarell_Watercolor_v2":
@@ -123,14 +412,82 @@ Return ONLY the illustration description, nothing else."""
             )
             return f"An illustration of: {illustration_prompt}"
 
-    def export(self, filename: str | Path | None = None) -> None:
+    def _optimize_illustrations(
+        self, dpi: int, image_format: str, quality: int, max_workers: int
+    ) -> dict:
+        """
+        Resample and re-encode every illustration for the 5"x5" picture frame used in
+        exported slides, returning a mapping from original to optimized paths.
+        Illustrations that cannot be optimized are left out of the mapping.
+        """
+        sources = list(
+            dict.fromkeys(
+                illustration
+                for illustration in [self.title_illustration, *self.illustrations]
+                if isinstance(illustration, str)
+            )
+        )
+
+        def optimize(source: str) -> str | None:
+            try:
+                return str(
+                    optimize_image(
+                        self._illustration_file(source), 5 * dpi, image_format, quality
+                    )
+                )
+            except Exception as e:
+                print(f"Warning: Could not optimize illustration {source}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            optimized = executor.map(optimize, sources)
+            return {
+                source: path
+                for source, path in zip(sources, optimized)
+                if path is not None
+            }
+
+    def export(
+        self,
+        filename: str | Path | BinaryIO | None = None,
+        optimize_images: bool = False,
+        image_dpi: int = 150,
+        image_format: str = "jpeg",
+        image_quality: int = 85,
+        max_workers: int = 4,
+    ) -> Path | BinaryIO:
         """
         Export the book to a PowerPoint file.
 
         Args:
-            filename: Optional path where to save the file. If None, creates in temp directory.
+            filename: Optional path where to save the file, or a writable binary file-like
+                     object (e.g. `io.BytesIO` or an HTTP response stream) to write the deck
+                     to without touching the disk. If None, creates in temp directory.
+            optimize_images: If True, illustrations are resampled to `image_dpi` for their
+                            5"x5" frame and re-encoded before being added, which makes the
+                            deck much smaller. Optimized images are cached for re-exports.
+            image_dpi: Target resolution of optimized illustrations.
+            image_format: Format of optimized illustrations, "jpeg" or "png". Other formats
+                          raise a ValueError.
+            image_quality: JPEG quality of optimized illustrations, from 1 to 100.
+            max_workers: Number of illustrations optimized in parallel.
+
+        Returns:
+            The absolute path of the exported file, or the file-like object it was written to.
         """
-        if filename is None:
+        from pptx import Presentation
+        from pptx.util import Inches
+        from pptx.enum.text import PP_ALIGN
+        from pptx.enum.shapes import MSO_SHAPE
+        from pptx.dml.color import RGBColor
+
+        started = time.perf_counter()
+        if optimize_images:
+            # Fail before any file is created rather than once per illustration
+            _optimized_format(image_format)
+        if hasattr(filename, "write"):
+            output_path = None
+        elif filename is None:
             # Create temp file with .pptx extension
             temp_file = tempfile.NamedTemporaryFile(suffix=".pptx", delete=False)
             output_path = Path(temp_file.name)
@@ -141,6 +498,14 @@ Return ONLY the illustration description, nothing else."""
             # Ensure parent directories exist
             output_path.parent.mkdir(parents=True, exist_ok=True)
 
+        optimized = (
+            self._optimize_illustrations(
+                image_dpi, image_format, image_quality, max_workers
+            )
+            if optimize_images
+            else {}
+        )
+
         prs = Presentation()
 
         # Add title slide
@@ -158,7 +523,10 @@ Return ONLY the illustration description, nothing else."""
         if isinstance(self.title_illustration, str):
             try:
                 slide.shapes.add_picture(
-                    self.title_illustration,
+                    optimized.get(
+                        self.title_illustration,
+                        self._illustration_file(self.title_illustration),
+                    ),
                     Inches(2.5),
                     Inches(1.5),
                     Inches(5),
@@ -180,42 +548,13 @@ Return ONLY the illustration description, nothing else."""
         p1.font.name = "Trebuchet MS"
         p1.alignment = PP_ALIGN.CENTER
 
-        # Define common stop words
-        stop_words = {
-            "a",
-            "an",
-            "and",
-            "are",
-            "as",
-            "at",
-            "be",
-            "by",
-            "for",
-            "from",
-            "has",
-            "he",
-            "in",
-            "is",
-            "it",
-            "its",
-            "of",
-            "on",
-            "that",
-            "the",
-            "to",
-            "was",
-            "were",
-            "will",
-            "with",
-        }
-
         # Split title and add each word with appropriate size
         words = self.title.split()
         for i, word in enumerate(words):
             run = p1.add_run()
             run.text = word + (" " if i < len(words) - 1 else "")
             run.font.name = "Trebuchet MS"
-            if word.lower() in stop_words:
+            if word.lower() in STOP_WORDS:
                 run.font.size = Inches(0.42)  # Smaller size for stop words
             else:
                 run.font.size = Inches(0.5)  # Regular size for other words
@@ -236,16 +575,21 @@ Return ONLY the illustration description, nothing else."""
 
         # Add content slides
         content_slide_layout = prs.slide_layouts[5]  # Blank layout
+        template = get_content_slide_template()
 
         for page_num, (text, illustration) in enumerate(
             zip(self.pages, self.illustrations)
         ):
-            slide = prs.slides.add_slide(content_slide_layout)
+            slide = template.add_slide(prs, content_slide_layout)
 
             if isinstance(illustration, str):
                 try:
                     slide.shapes.add_picture(
-                        illustration, Inches(2.5), Inches(1.4), Inches(5), Inches(5)
+                        optimized.get(illustration, self._illustration_file(illustration)),
+                        Inches(2.5),
+                        Inches(1.4),
+                        Inches(5),
+                        Inches(5),
                     )
                 except Exception as e:
                     print(
@@ -282,47 +626,113 @@ Return ONLY the illustration description, nothing else."""
                     p.font.size = Inches(0.25)
                     p.alignment = PP_ALIGN.CENTER
             else:
-                # Add each sentence as a separate paragraph
-                first_paragraph = True
-                for sentence in sentences:
-                    if first_paragraph:
-                        p = slide.shapes.title.text_frame.paragraphs[0]
-                        first_paragraph = False
-                    else:
-                        p = slide.shapes.title.text_frame.add_paragraph()
-                    p.line_spacing = 1.5  # Add line spacing
-                    p.text = sentence
-                    p.font.name = "Trebuchet MS"
-                    p.font.size = Inches(0.25)
-                    p.alignment = PP_ALIGN.CENTER
+                # Add each sentence as a separate, identically styled paragraph
+                template.fill_paragraphs(slide.shapes.title.text_frame, sentences)
 
             # Add page number at bottom center
-            page_number = page_num + 1  # Add 1 since page_num is 0-based
-            page_num_box = slide.shapes.add_textbox(
-                Inches(0),
-                Inches(6.5),  # Y position near bottom of slide
-                Inches(10),
-                Inches(0.5),  # Full width of slide for centering
-            )
-            page_num_frame = page_num_box.text_frame
-            page_num_frame.text = str(page_number)
-            page_num_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-            page_num_frame.paragraphs[0].font.name = "Trebuchet MS"
-            page_num_frame.paragraphs[0].font.size = Inches(
-                0.15
-            )  # Slightly smaller than main text
+            template.add_page_number(slide, page_num + 1)
 
         # Save the presentation
+        if output_path is None:
+            prs.save(filename)
+            metrics.emit("export", time.perf_counter() - started, pages=len(self.pages))
+            return filename
         prs.save(str(output_path))
+        metrics.emit(
+            "export",
+            time.perf_counter() - started,
+            pages=len(self.pages),
+            bytes=output_path.stat().st_size,
+        )
         print(f"Book exported to: {output_path.absolute()}")
         return output_path.absolute()
 
+    def export_bytes(self, **kwargs) -> bytes:
+        """
+        Export the book to PowerPoint and return the file contents, without writing
+        anything to disk.
+
+        Args:
+            **kwargs: Options passed on to `export`.
+        """
+        buffer = io.BytesIO()
+        self.export(buffer, **kwargs)
+        return buffer.getvalue()
+
+    def export_pdf(
+        self,
+        filename: str | Path | BinaryIO | None = None,
+        dpi: int = 192,
+        compression: Literal["jpeg", "flate"] = "jpeg",
+        quality: int = 85,
+    ) -> Path | BinaryIO:
+        """
+        Export the book to a multi-page PDF with the same layout as `create_preview`.
+        Pages are rendered and written one at a time, so memory use doesn't grow
+        with the length of the book.
+
+        Args:
+            filename: Optional path where to save the file, or a writable binary file-like
+                     object. If None, creates in temp directory.
+            dpi: Resolution of the pages. Pages are 10 x 5.625 inches and rendered at
+                 the 1920x1080 preview resolution, which is the default of 192 dpi. Lower
+                 values downscale the pages for smaller files. Higher values would only
+                 upscale them without adding detail, so they raise a ValueError.
+            compression: "jpeg" for small files, or "flate" for lossless pages.
+            quality: JPEG quality from 1 to 100.
+
+        Returns:
+            The absolute path of the exported file, or the file-like object it was written to.
+            Files are written atomically, so a failed export leaves no partial PDF behind.
+        """
+        # Fail before any file is created
+        if not 0 < dpi <= NATIVE_DPI:
+            raise ValueError(f"PDF resolution must be between 1 and {NATIVE_DPI} dpi, got {dpi}")
+        if compression not in PDF_COMPRESSIONS:
+            raise ValueError(f"Unsupported PDF compression: {compression!r}")
+        if hasattr(filename, "write"):
+            output_path = None
+        elif filename is None:
+            temp_file = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+            output_path = Path(temp_file.name)
+            temp_file.close()
+        else:
+            output_path = Path(filename).resolve()
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        started = time.perf_counter()
+        size = (round(PAGE_WIDTH / NATIVE_DPI * dpi), round(PAGE_HEIGHT / NATIVE_DPI * dpi))
+        output = nullcontext(filename) if output_path is None else atomic_write(output_path)
+        with output as f, PDFWriter(f, compression=compression, quality=quality) as pdf:
+            for num in range(len(self.pages) + 1):
+                # Pages are only drawn once, so their illustrations aren't kept in memory
+                page = render_page(self._page_spec(num), cache_illustrations=False)
+                if page.size != size:
+                    page = page.resize(size)
+                pdf.add_page(page, dpi=dpi)
+        metrics.emit("export_pdf", time.perf_counter() - started, pages=len(self.pages) + 1)
+
+        if output_path is None:
+            return filename
+        print(f"Book exported to: {output_path}")
+        return output_path
+
     def __len__(self) -> int:
         """Return the number of pages in the book."""
         return len(self.pages)
 
     def illustrate(
-        self, save_dir: str | Path | None = None, page_num: int | None = None
+        self,
+        save_dir: str | Path | None = None,
+        page_num: int | None = None,
+        max_workers: int = 1,
+        batch_prompts: bool = True,
+        image_cache: ImageCache | bool = True,
+        retry_policy: RetryPolicy | None = None,
+        image_format: str = "png",
+        image_size: tuple[int, int] | None = None,
+        checkpoint: str | Path | None = None,
+        executor: Executor | None = None,
     ) -> str | None:
         """
         Generate illustrations using the Hugging Face Inference API.
@@ -332,20 +742,215 @@ Return ONLY the illustration description, nothing else."""
                      If None, creates a temporary directory.
             page_num: Optional specific page to illustrate (0 for title page, 1+ for content pages).
                      If None, illustrates all pages.
+            max_workers: Maximum number of pages to illustrate concurrently. Prompt
+                     extraction and image generation for different pages run in parallel
+                     when this is greater than 1.
+            batch_prompts: If True and all pages are being illustrated, missing illustration
+                     prompts are extracted with batched requests before any images are generated.
+            image_cache: Cache of previously generated images that is checked before calling
+                     the API. True uses the shared on-disk cache, False disables caching.
+            retry_policy: Timeouts and retry behavior for image generation requests, which go
+                     through a pooled keep-alive session. Defaults to `RetryPolicy()`.
+            image_format: Format to save illustrations in. Images already returned in this
+                     format are written to disk as-is, without being decoded.
+            image_size: Optional (width, height) to resize illustrations to.
+            checkpoint: Optional path of a JSON file the book is saved to (atomically) after
+                     every finished page. If the file already exists and holds the same book,
+                     illustrations and prompts from it are reused, so an interrupted run
+                     resumes where it stopped.
+            executor: Optional executor to run pages on instead of creating one, e.g. to
+                     share one pool and concurrency limit between several books. It is
+                     not shut down, and `max_workers` is ignored when it is given.
+
+        Returns:
+            Status message if page_num is specified, None otherwise.
+        """
+        from tqdm import tqdm
+
+        job = self._start_illustration(
+            save_dir, page_num, image_cache, retry_policy, image_format, image_size, checkpoint
+        )
+        if isinstance(job, str):
+            return job
+        tasks = self._illustration_tasks(page_num)
+
+        if batch_prompts and job.verbose and tasks:
+            self.generate_prompts()
+            if checkpoint:
+                self._write_json(checkpoint)
+
+        def run_task(task_name: str, text: str) -> tuple[str | None, list[str]]:
+            # Messages are buffered so that concurrent pages don't interleave their output
+            log = []
+            with metrics.span("illustrate.page", page=task_name, ok=False) as attributes:
+                try:
+                    image_path = self._illustrate_task(job, task_name, text, log)
+                except Exception as e:
+                    return None, log + [self._page_error(task_name, e)]
+                attributes["ok"] = True
+            return image_path, log
+
+        owns_executor = executor is None and max_workers > 1 and len(tasks) > 1
+        if owns_executor:
+            executor = ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)))
+        if executor is not None:
+            futures = [executor.submit(run_task, *task) for task in tasks]
+            results = (future.result() for future in futures)
+        else:
+            futures = []
+            results = (run_task(*task) for task in tasks)
+
+        try:
+            # Results are consumed in task order, so assignment and output stay ordered
+            for (task_name, _), (image_path, log) in tqdm(
+                zip(tasks, results),
+                desc="Generating illustrations",
+                total=len(tasks),
+                disable=not job.verbose,
+            ):
+                error = self._finish_page(job, task_name, image_path, log)
+                if checkpoint:
+                    # Prompts are kept even when generating the image failed
+                    self._write_json(checkpoint)
+                if error and not job.verbose:
+                    return f"Error: {error}"
+        finally:
+            if owns_executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+            else:
+                for future in futures:
+                    future.cancel()
+
+        if page_num is None:
+            print(f"\nAll illustrations saved to: {job.save_dir}")
+        else:
+            return "Illustration generated successfully!"
+
+    async def aillustrate(
+        self,
+        save_dir: str | Path | None = None,
+        page_num: int | None = None,
+        max_concurrency: int = 8,
+        semaphore: "asyncio.Semaphore | None" = None,
+        image_cache: ImageCache | bool = True,
+        retry_policy: RetryPolicy | None = None,
+        image_format: str = "png",
+        image_size: tuple[int, int] | None = None,
+        checkpoint: str | Path | None = None,
+        http_client: "httpx.AsyncClient | None" = None,
+    ) -> str | None:
+        """
+        The coroutine version of `illustrate`. Every page is illustrated in its own
+        asyncio task using the async inference clients, so a single event loop can
+        illustrate many books at the same time. Cancelling the coroutine cancels the
+        pages still in progress; pages that already finished are kept.
+
+        Args:
+            save_dir: Optional directory to save the generated images.
+                     If None, creates a temporary directory.
+            page_num: Optional specific page to illustrate (0 for title page, 1+ for content pages).
+                     If None, illustrates all pages.
+            max_concurrency: Maximum number of pages of this book illustrated at the same time.
+            semaphore: Optional semaphore limiting the pages illustrated at the same time
+                     instead, e.g. one semaphore shared by every book driven by the event
+                     loop. `max_concurrency` is ignored when it is given.
+            image_cache: Cache of previously generated images, see `illustrate`.
+            retry_policy: Timeouts and retry behavior for image generation requests.
+            image_format: Format to save illustrations in.
+            image_size: Optional (width, height) to resize illustrations to.
+            checkpoint: Optional path of a JSON file the book is saved to after every
+                     finished page, see `illustrate`.
+            http_client: Optional `httpx.AsyncClient` to send image requests with. By
+                     default a client is created for the call and closed afterwards.
 
         Returns:
             Status message if page_num is specified, None otherwise.
         """
-        token = huggingface_hub.get_token()
-        if not token:
-            msg = "No Hugging Face token found. Please login using `huggingface-cli login`"
+        import asyncio
+        import httpx
+
+        # Resuming reads the checkpoint, so the setup runs off the event loop
+        job = await asyncio.to_thread(
+            self._start_illustration,
+            save_dir,
+            page_num,
+            image_cache,
+            retry_policy,
+            image_format,
+            image_size,
+            checkpoint,
+        )
+        if isinstance(job, str):
+            return job
+        tasks = self._illustration_tasks(page_num)
+        semaphore = semaphore or asyncio.Semaphore(max_concurrency)
+        checkpoint_lock = asyncio.Lock()
+        errors = []
+
+        async def run_task(task_name: str, text: str) -> None:
+            log = []
+            image_path = None
+            try:
+                async with semaphore:
+                    with metrics.span("illustrate.page", page=task_name, ok=False) as attributes:
+                        image_path = await self._aillustrate_task(
+                            job, task_name, text, log, http_client
+                        )
+                        attributes["ok"] = True
+            except Exception as e:
+                log.append(self._page_error(task_name, e))
+
+            error = self._finish_page(job, task_name, image_path, log)
+            if error:
+                errors.append(error)
+            if checkpoint:
+                # Prompts are kept even when generating the image failed. The book is
+                # snapshotted on the loop, and the lock keeps the writes in order
+                data = self._to_dict()
+                async with checkpoint_lock:
+                    await asyncio.to_thread(self._write_json, checkpoint, data)
+
+        owns_client = http_client is None
+        if owns_client:
+            http_client = httpx.AsyncClient()
+        try:
+            await asyncio.gather(*(run_task(*task) for task in tasks))
+        finally:
+            if owns_client:
+                await http_client.aclose()
+
+        if page_num is None:
+            print(f"\nAll illustrations saved to: {job.save_dir}")
+        elif errors:
+            return f"Error: {errors[0]}"
+        else:
+            return "Illustration generated successfully!"
+
+    def _start_illustration(
+        self,
+        save_dir: str | Path | None,
+        page_num: int | None,
+        image_cache: ImageCache | bool,
+        retry_policy: RetryPolicy | None,
+        image_format: str,
+        image_size: tuple[int, int] | None,
+        checkpoint: str | Path | None,
+    ) -> "_IllustrationJob | str":
+        """
+        The setup shared by `illustrate` and `aillustrate`: check the credentials of the
+        image backend, create the save directory and resume from `checkpoint`.
+
+        Returns:
+            The settings of the pages to illustrate, or an error message if a single
+            page was requested and can't be illustrated.
+        """
+        image_backend = self.image_backend
+        msg = image_backend.missing_credentials()
+        if msg:
             if page_num is not None:
                 return f"Error: {msg}"
             warnings.warn(msg)
 
-        API_URL = f"https://api-inference.huggingface.co/models/{self.lora}"
-        headers = {"Authorization": f"Bearer {token}"}
-
         # Create save directory if provided
         if save_dir:
             save_dir = Path(save_dir)
@@ -353,7 +958,28 @@ Return ONLY the illustration description, nothing else."""
         else:
             save_dir = Path(tempfile.mkdtemp())
 
-        # Create list of tasks
+        if checkpoint:
+            self._resume_from(checkpoint)
+
+        verbose = page_num is None
+        if verbose:
+            print("Generating illustrations... This could take a few minutes.")
+        return _IllustrationJob(
+            api_url=image_backend.url(self.lora),
+            headers=image_backend.headers(),
+            save_dir=save_dir,
+            image_cache=ImageCache() if image_cache is True else image_cache or None,
+            retry_policy=retry_policy,
+            image_format=normalize_format(image_format),
+            image_size=image_size,
+            verbose=verbose,
+        )
+
+    def _illustration_tasks(self, page_num: int | None = None) -> List[tuple[str, str]]:
+        """
+        Return the (task name, text) of the pages `illustrate` has to generate, skipping
+        pages whose illustration already exists or is explicitly disabled.
+        """
         if page_num is not None:
             if page_num == 0:
                 tasks = [("title", self.title, self.title_illustration)]
@@ -367,7 +993,6 @@ Return ONLY the illustration description, nothing else."""
                     )
                 ]
         else:
-            print("Generating illustrations... This could take a few minutes.")
             tasks = []
             if self.title_illustration is None:
                 tasks.append(("title", self.title, None))
@@ -378,225 +1003,352 @@ Return ONLY the illustration description, nothing else."""
                 )
             )
 
-        for task_name, text, current_illust in tqdm(
-            tasks, desc="Generating illustrations", disable=page_num is not None
+        return [
+            (task_name, text)
+            for task_name, text, current_illust in tasks
+            if not (isinstance(current_illust, str) or current_illust is False)
+        ]
+
+    def _resume_from(self, checkpoint: str | Path) -> None:
+        """
+        Reuse the illustrations and prompts saved in `checkpoint` for pages that don't
+        have them yet, if the checkpoint holds the same book.
+        """
+        checkpoint = Path(checkpoint)
+        if not checkpoint.exists():
+            return
+        with open(checkpoint, "r", encoding="utf-8") as f:
+            book_data = json.load(f)
+        if book_data["title"] != self.title or book_data["pages"] != self.pages:
+            warnings.warn(
+                f"Checkpoint {checkpoint} holds a different book and will be overwritten."
+            )
+            return
+
+        def done(illustration) -> bool:
+            return isinstance(illustration, str) and os.path.exists(illustration)
+
+        resumed = 0
+        if self.title_illustration is None and done(book_data["title_illustration"]):
+            self.title_illustration = book_data["title_illustration"]
+            resumed += 1
+        if not self.title_illustration_prompt:
+            self.title_illustration_prompt = book_data["title_illustration_prompt"]
+        for i, (illustration, prompt) in enumerate(
+            zip(book_data["illustrations"], book_data["illustration_prompts"])
         ):
-            # Skip if illustration already exists or is explicitly disabled
-            if isinstance(current_illust, str) or current_illust is False:
-                continue
+            if self.illustrations[i] is None and done(illustration):
+                self.illustrations[i] = illustration
+                resumed += 1
+            if not self.illustration_prompts[i]:
+                self.illustration_prompts[i] = prompt
+        if resumed:
+            print(f"Resuming from checkpoint: {resumed} illustration(s) already generated")
+
+    def _page_illustration_prompt(self, task_name: str) -> str | None:
+        """Return the illustration prompt of the page named `task_name`, if it has one."""
+        if task_name == "title":
+            return self.title_illustration_prompt
+        return self.illustration_prompts[int(task_name.split("_")[1]) - 1]
+
+    def _set_page_illustration_prompt(self, task_name: str, prompt: str) -> None:
+        """Set the illustration prompt of the page named `task_name`."""
+        if task_name == "title":
+            self.title_illustration_prompt = prompt
+        else:
+            self.illustration_prompts[int(task_name.split("_")[1]) - 1] = prompt
 
-            try:
-                if page_num is None:
-                    print(f"\n=== Processing {task_name} ===")
-                    print(f"Original text: {text}")
-
-                if task_name == "title":
-                    if not self.title_illustration_prompt:
-                        self.title_illustration_prompt = self._get_illustration_prompt(
-                            text
-                        )
-                    if page_num is None:
-                        print(
-                            f"Title illustration prompt: {self.title_illustration_prompt}"
-                        )
-                    prompt = self._get_prompt(self.title_illustration_prompt)
-                    if page_num is None:
-                        print(f"Final title image prompt: {prompt}")
-                else:
-                    page_idx = int(task_name.split("_")[1]) - 1
-                    if not self.illustration_prompts[page_idx]:
-                        self.illustration_prompts[page_idx] = (
-                            self._get_illustration_prompt(text)
-                        )
-                    if page_num is None:
-                        print(
-                            f"Illustration prompt: {self.illustration_prompts[page_idx]}"
-                        )
-                    prompt = self._get_prompt(self.illustration_prompts[page_idx])
-                    if page_num is None:
-                        print(f"Final image prompt: {prompt}")
+    def _page_request(
+        self, job: "_IllustrationJob", task_name: str, text: str, log: List[str]
+    ) -> tuple[str, Path, str]:
+        """
+        Return the image prompt, image path and image cache key of a page whose
+        illustration prompt is known, and log them.
+        """
+        illustration_prompt = self._page_illustration_prompt(task_name)
+        prompt = self._get_prompt(illustration_prompt)
+        if job.verbose:
+            log.append(f"\n=== Processing {task_name} ===")
+            log.append(f"Original text: {text}")
+            log.append(f"Illustration prompt: {illustration_prompt}")
+            log.append(f"Final image prompt: {prompt}")
+
+        image_path = job.save_dir / (
+            f"{task_name}.{EXTENSIONS.get(job.image_format, job.image_format)}"
+        )
+        # Images are keyed by the endpoint, so other servers' images aren't reused
+        cache_key = ImageCache.make_key(
+            job.api_url, prompt, {"format": job.image_format, "size": job.image_size}
+        )
+        return prompt, image_path, cache_key
+
+    @staticmethod
+    def _page_error(task_name: str, e: Exception) -> str:
+        """Return the message reported when illustrating a page raised `e`."""
+        if isinstance(e, _IllustrationError):
+            return str(e)
+        return f"Error generating illustration for {task_name}: {e}"
 
-                response = requests.post(
-                    API_URL, headers=headers, json={"inputs": prompt}
+    def _finish_page(
+        self,
+        job: "_IllustrationJob",
+        task_name: str,
+        image_path: str | None,
+        log: List[str],
+    ) -> str | None:
+        """
+        Record the illustration of a finished page and print its log. If the page
+        failed, `image_path` is None and the last log message is the error, which is
+        returned.
+        """
+        error = None
+        if image_path is None:
+            error = log.pop()
+            log.append(f"Warning: {error}")
+        elif task_name == "title":
+            self.title_illustration = image_path
+        else:
+            self.illustrations[int(task_name.split("_")[1]) - 1] = image_path
+        if job.verbose:
+            print("\n".join(log))
+        return error
+
+    def _illustrate_task(
+        self, job: "_IllustrationJob", task_name: str, text: str, log: List[str]
+    ) -> str:
+        """
+        Generate the illustration for a single title or content page.
+
+        Returns the path of the saved image, and raises on failure. Progress
+        messages are appended to `log` when `job.verbose` is set. The image is copied
+        from the image cache instead of generated when it has been rendered before.
+        """
+        if not self._page_illustration_prompt(task_name):
+            self._set_page_illustration_prompt(
+                task_name, self._get_illustration_prompt(text, task_name)
+            )
+        prompt, image_path, cache_key = self._page_request(job, task_name, text, log)
+        outcome = "Image loaded from cache"
+
+        def cached() -> str | None:
+            if job.image_cache and job.image_cache.copy_to(cache_key, image_path):
+                metrics.emit("image.cache_hit", page=task_name)
+                return str(image_path)
+            return None
+
+        def generate() -> str:
+            nonlocal outcome
+            outcome = "Image saved to"
+            with metrics.span("image.generate", page=task_name, model=self.lora) as attributes:
+                response = post_with_retry(
+                    job.api_url,
+                    headers=job.headers,
+                    json=self.image_backend.payload(prompt),
+                    policy=job.retry_policy,
+                    stream=True,
+                    on_retry=job.retry_logger(task_name, log),
+                    endpoint="image",
                 )
+                attributes["status"] = response.status_code
 
                 if response.status_code != 200:
-                    msg = f"Failed to generate illustration for {task_name}: {response.text}"
-                    if page_num is not None:
-                        return f"Error: {msg}"
-                    print(f"Warning: {msg}")
-                    continue
-
-                # Save the image
-                image = Image.open(io.BytesIO(response.content))
-                image_path = save_dir / f"{task_name}.png"
-                image.save(image_path)
-                if page_num is None:
-                    print(f"Image saved to: {image_path}")
-
-                # Update the appropriate illustration reference
-                if task_name == "title":
-                    self.title_illustration = str(image_path)
-                else:
-                    page_idx = int(task_name.split("_")[1]) - 1
-                    self.illustrations[page_idx] = str(image_path)
+                    raise _IllustrationError(
+                        f"Failed to generate illustration for {task_name}: {response.text}"
+                    )
 
-            except Exception as e:
-                msg = f"Error generating illustration for {task_name}: {e}"
-                if page_num is not None:
-                    return f"Error: {msg}"
-                print(f"Warning: {msg}")
-                continue
+                # Save the image, only decoding it if it has to be converted
+                with response:
+                    attributes["bytes"] = save_response_image(
+                        response, image_path, job.image_format, job.image_size
+                    )
+            if job.image_cache:
+                job.image_cache.put(cache_key, image_path)
+            return str(image_path)
+
+        # Identical requests from other pages or workers share one generation
+        result = get_single_flight("image").do(cache_key, generate, check=cached)
+        if result != str(image_path):
+            shutil.copyfile(result, image_path)
+            outcome = "Image shared with another page"
+        if job.verbose:
+            log.append(f"{outcome}: {image_path}")
+        return str(image_path)
+
+    async def _aillustrate_task(
+        self,
+        job: "_IllustrationJob",
+        task_name: str,
+        text: str,
+        log: List[str],
+        http_client: "httpx.AsyncClient",
+    ) -> str:
+        """The coroutine version of `_illustrate_task`."""
+        import asyncio
+
+        if not self._page_illustration_prompt(task_name):
+            self._set_page_illustration_prompt(
+                task_name, await self.aget_illustration_prompt(text, task_name)
+            )
+        prompt, image_path, cache_key = self._page_request(job, task_name, text, log)
+        outcome = "Image loaded from cache"
 
-        if page_num is None:
-            print(f"\nAll illustrations saved to: {save_dir}")
+        if job.image_cache and await asyncio.to_thread(
+            job.image_cache.copy_to, cache_key, image_path
+        ):
+            metrics.emit("image.cache_hit", page=task_name)
+            if job.verbose:
+                log.append(f"{outcome}: {image_path}")
+            return str(image_path)
+
+        async def generate() -> str:
+            nonlocal outcome
+            outcome = "Image saved to"
+            with metrics.span("image.generate", page=task_name, model=self.lora) as attributes:
+                response = await apost_with_retry(
+                    http_client,
+                    job.api_url,
+                    headers=job.headers,
+                    json=self.image_backend.payload(prompt),
+                    policy=job.retry_policy,
+                    on_retry=job.retry_logger(task_name, log),
+                    endpoint="image",
+                )
+                attributes["status"] = response.status_code
+                if response.status_code != 200:
+                    raise _IllustrationError(
+                        f"Failed to generate illustration for {task_name}: {response.text}"
+                    )
+                # Decoding and writing the image happen off the event loop
+                attributes["bytes"] = await asyncio.to_thread(
+                    save_image_bytes,
+                    response.content,
+                    image_path,
+                    job.image_format,
+                    job.image_size,
+                )
+            if job.image_cache:
+                await asyncio.to_thread(job.image_cache.put, cache_key, image_path)
+            return str(image_path)
+
+        # Identical requests from other pages share one generation
+        result = await get_single_flight("image").ado(cache_key, generate)
+        if result != str(image_path):
+            await asyncio.to_thread(shutil.copyfile, result, image_path)
+            outcome = "Image shared with another page"
+        if job.verbose:
+            log.append(f"{outcome}: {image_path}")
+        return str(image_path)
+
+    def _page_state(self, page_num: int) -> tuple:
+        """Return everything that affects page `page_num` (0 for the title page)."""
+        if page_num == 0:
+            illustration = self.title_illustration
+            state = (self.title, self.author, self.title_illustration_prompt)
         else:
-            return "Illustration generated successfully!"
+            illustration = self.illustrations[page_num - 1]
+            state = (self.pages[page_num - 1], self.illustration_prompts[page_num - 1])
 
-    def create_preview(self, page_num: int | None = None):
+        # Illustrations regenerated in place keep their path, so include the mtime
+        mtime = None
+        if isinstance(illustration, str):
+            try:
+                mtime = os.stat(illustration).st_mtime_ns
+            except OSError:
+                pass
+        return state + (illustration, mtime)
+
+    def page_version(self, page_num: int) -> int:
         """
-        Create visual previews of book pages.
+        Return the version of a page, which increases every time its text, prompt or
+        illustration changes.
 
         Args:
-            page_num: Optional specific page to preview (0 for title page, 1+ for content pages).
-                     If None, creates previews for all pages.
+            page_num: The page (0 for title page, 1+ for content pages).
         """
-        # Constants for page layout (matching PowerPoint dimensions and positioning)
-        PAGE_WIDTH = 1920
-        PAGE_HEIGHT = 1080
-        ILLUSTRATION_WIDTH = 840
-        ILLUSTRATION_HEIGHT = 840
-        ILLUSTRATION_X = (PAGE_WIDTH - ILLUSTRATION_WIDTH) // 2
-        ILLUSTRATION_Y = 120
-
-        # Try to load Trebuchet MS font, fall back to Arial if not available
-        try:
-            title_font = ImageFont.truetype("Trebuchet MS", 96)
-            body_font = ImageFont.truetype("Trebuchet MS", 48)
-            page_num_font = ImageFont.truetype("Trebuchet MS", 29)
-            author_font = ImageFont.truetype("Trebuchet MS", 48)
-        except OSError:
-            title_font = ImageFont.truetype("Arial", 96)
-            body_font = ImageFont.truetype("Arial", 48)
-            page_num_font = ImageFont.truetype("Arial", 29)
-            author_font = ImageFont.truetype("Arial", 48)
-
-        # Determine which pages to process
-        if page_num is not None:
-            if page_num == 0:
-                pages_to_process = [(0, "title", None, None)]
-            else:
-                page_idx = page_num - 1
-                pages_to_process = [
-                    (
-                        page_num,
-                        "content",
-                        self.pages[page_idx],
-                        self.illustrations[page_idx],
-                    )
-                ]
-        else:
-            # Process all pages
-            pages_to_process = [(0, "title", None, None)]  # Title page
-            pages_to_process.extend(
-                (i + 1, "content", text, illust)
-                for i, (text, illust) in enumerate(zip(self.pages, self.illustrations))
-            )
+        state = self._page_state(page_num)
+        if self._page_states.get(page_num) != state:
+            self._page_states[page_num] = state
+            self._page_versions[page_num] = self._page_versions.get(page_num, 0) + 1
+        return self._page_versions[page_num]
 
-        # Process each page
-        for page_num, page_type, text, illustration in pages_to_process:
-            if page_type == "title":
-                # Create title page
-                page = Image.new("RGB", (PAGE_WIDTH, PAGE_HEIGHT), "white")
-                draw = ImageDraw.Draw(page)
-
-                # Add maroon border on left
-                draw.rectangle([(0, 0), (38, PAGE_HEIGHT)], fill=(128, 0, 0))
-
-                # Add title illustration if available
-                if isinstance(self.title_illustration, str):
-                    try:
-                        illust = Image.open(self.title_illustration)
-                        illust = illust.resize(
-                            (ILLUSTRATION_WIDTH, ILLUSTRATION_HEIGHT)
-                        )
-                        page.paste(illust, (ILLUSTRATION_X, ILLUSTRATION_Y))
-                    except Exception as e:
-                        print(f"Warning: Could not add title illustration: {e}")
-
-                # Add title text
-                title_y = 40
-                bbox = draw.textbbox((0, 0), self.title, font=title_font)
-                title_width = bbox[2] - bbox[0]
-                draw.text(
-                    ((PAGE_WIDTH - title_width) // 2, title_y),
-                    self.title,
-                    font=title_font,
-                    fill="black",
-                )
+    def mark_dirty(self, page_num: int | None = None) -> None:
+        """
+        Force a page to be re-rendered by the next `create_preview` call.
 
-                # Add author if available
-                if self.author:
-                    author_text = f"Written by {self.author}"
-                    bbox = draw.textbbox((0, 0), author_text, font=author_font)
-                    author_width = bbox[2] - bbox[0]
-                    draw.text(
-                        ((PAGE_WIDTH - author_width) // 2, PAGE_HEIGHT - 100),
-                        author_text,
-                        font=author_font,
-                        fill="black",
-                    )
+        Args:
+            page_num: The page (0 for title page, 1+ for content pages).
+                     If None, marks every page dirty.
+        """
+        page_nums = range(len(self.pages) + 1) if page_num is None else [page_num]
+        for num in page_nums:
+            self._page_versions[num] = self.page_version(num) + 1
+
+    def _is_dirty(self, page_num: int) -> bool:
+        return (
+            not self.page_previews.has_page(page_num)
+            or self._rendered_versions.get(page_num) != self.page_version(page_num)
+        )
 
-            else:
-                # Create content page
-                page = Image.new("RGB", (PAGE_WIDTH, PAGE_HEIGHT), "white")
-                draw = ImageDraw.Draw(page)
-
-                # Add illustration if available
-                if isinstance(illustration, str):
-                    try:
-                        illust = Image.open(illustration)
-                        illust = illust.resize(
-                            (ILLUSTRATION_WIDTH, ILLUSTRATION_HEIGHT)
-                        )
-                        page.paste(illust, (ILLUSTRATION_X, ILLUSTRATION_Y))
-                    except Exception as e:
-                        print(
-                            f"Warning: Could not add illustration on page {page_num}: {e}"
-                        )
+    def dirty_pages(self) -> List[int]:
+        """Return the pages whose previews are missing or out of date."""
+        return [num for num in range(len(self.pages) + 1) if self._is_dirty(num)]
+
+    def _page_spec(self, page_num: int) -> tuple:
+        """Return the spec `drawbook.render.render_page` draws page `page_num` from."""
+        if page_num == 0:
+            return (
+                "title",
+                self.title,
+                self.author,
+                self._illustration_file(self.title_illustration),
+            )
+        return (
+            "content",
+            page_num,
+            self.pages[page_num - 1],
+            self._illustration_file(self.illustrations[page_num - 1]),
+        )
 
-                # Add text
-                text_y = 50
-                wrapped_text = textwrap.fill(text, width=50)
-                bbox = draw.textbbox((0, 0), wrapped_text, font=body_font)
-                text_width = bbox[2] - bbox[0]
-                draw.text(
-                    ((PAGE_WIDTH - text_width) // 2, text_y),
-                    wrapped_text,
-                    font=body_font,
-                    fill="black",
-                    align="center",
-                )
+    def create_preview(
+        self,
+        page_num: int | None = None,
+        max_workers: int = 1,
+        executor: Literal["process", "thread"] = "process",
+    ):
+        """
+        Create visual previews of book pages. Only pages that changed since they
+        were last rendered are drawn again.
 
-                # Add page number
-                page_num_text = str(page_num)
-                bbox = draw.textbbox((0, 0), page_num_text, font=page_num_font)
-                page_num_width = bbox[2] - bbox[0]
-                draw.text(
-                    ((PAGE_WIDTH - page_num_width) // 2, PAGE_HEIGHT - 100),
-                    page_num_text,
-                    font=page_num_font,
-                    fill="black",
-                )
+        Args:
+            page_num: Optional specific page to preview (0 for title page, 1+ for content pages).
+                     If None, creates previews for all pages.
+            max_workers: Maximum number of pages rendered in parallel.
+            executor: "process" to render pages in a process pool, or "thread" to use a
+                     thread pool instead.
+        """
+        if page_num is None:
+            # Drop previews of pages that have been removed from the book
+            del self.page_previews[len(self.pages) + 1 :]
+            page_nums = self.dirty_pages()
+        else:
+            page_nums = [page_num] if self._is_dirty(page_num) else []
 
-            # Update the preview pages
-            if page_num is None:
-                self.page_previews.append(page)
-            else:
-                # Ensure list is long enough
-                while len(self.page_previews) <= page_num:
-                    self.page_previews.append(None)
-                self.page_previews[page_num] = page
+        started = time.perf_counter()
+        pages = render_pages(
+            [self._page_spec(num) for num in page_nums], max_workers, executor
+        )
+        for num, page in zip(page_nums, pages):
+            # Ensure list is long enough
+            while len(self.page_previews) <= num:
+                self.page_previews.append(None)
+            self.page_previews[num] = page
+            self._rendered_versions[num] = self.page_version(num)
+        metrics.emit(
+            "create_preview",
+            time.perf_counter() - started,
+            pages=len(self.pages) + 1 if page_num is None else 1,
+            rendered=len(page_nums),
+        )
 
         return self.page_previews if page_num is None else self.page_previews[page_num]
 
@@ -604,6 +1356,8 @@ Return ONLY the illustration description, nothing else."""
         """
         Create a visual preview of the book pages and display them in a Gradio interface.
         """
+        import gradio as gr
+
         print("Creating preview...")
         self.create_preview()
 
@@ -613,17 +1367,23 @@ Return ONLY the illustration description, nothing else."""
 
             def select_page(selected: gr.SelectData):
                 index = selected.index
+                # The gallery only holds thumbnails, so send the full page on demand
+                full_page = self.page_previews.path(index)
                 if index == 0:
-                    return self.title, self.title_illustration_prompt, index
+                    return self.title, self.title_illustration_prompt, index, full_page
                 else:
                     return (
                         self.pages[index - 1],
                         self.illustration_prompts[index - 1],
                         index,
+                        full_page,
                     )
 
+            # Every export overwrites the same file instead of leaving a new temp file behind
+            export_dir = Path(tempfile.mkdtemp(prefix="drawbook-export-"))
+
             def export_book():
-                output_path = self.export()
+                output_path = self.export(export_dir / "book.pptx")
                 return gr.DownloadButton(value=output_path, interactive=True)
 
             gr.Markdown(f"<center><h1>{self.title}</h1></center>")
@@ -640,9 +1400,12 @@ Return ONLY the illustration description, nothing else."""
                             "Generate Prompt", variant="secondary"
                         )
                         image_button = gr.Button("Generate Image", variant="primary")
+                    full_page = gr.Image(
+                        label="Selected page", type="filepath", interactive=False
+                    )
                 with gr.Column():
                     gallery = gr.Gallery(
-                        value=self.page_previews,
+                        value=self.page_previews.thumbnails(),
                         columns=2,
                         rows=2,
                         height=600,
@@ -673,12 +1436,15 @@ Return ONLY the illustration description, nothing else."""
                     yield {prompt: illustration_prompt}
                 self.illustrate(page_num=selected_page)
                 self.create_preview(page_num=selected_page)
-                print("self.page_previews", self.page_previews)
-                yield {gallery: self.page_previews, image_button: gr.Button("Generate Image", interactive=True)}
+                yield {
+                    gallery: self.page_previews.thumbnails(),
+                    full_page: self.page_previews.path(selected_page),
+                    image_button: gr.Button("Generate Image", interactive=True),
+                }
 
             gallery.select(
                 select_page,
-                outputs=[page, prompt, selected_page],
+                outputs=[page, prompt, selected_page, full_page],
                 show_progress="hidden",
             )
             prompt_button.click(
@@ -690,7 +1456,7 @@ Return ONLY the illustration description, nothing else."""
             image_button.click(
                 fn=generate_illustration_page,
                 inputs=[selected_page, page, prompt],
-                outputs=[image_button, gallery, prompt],
+                outputs=[image_button, gallery, prompt, full_page],
                 show_progress="minimal",
             )
             export_button.click(
@@ -702,31 +1468,52 @@ Return ONLY the illustration description, nothing else."""
 
         preview_interface.launch()
 
-    def save(self, filepath: str | Path = "book.json") -> None:
-        """
-        Save the book data to a JSON file.
-
-        Args:
-            filepath: Path where to save the JSON file. Defaults to "book.json"
-        """
-        filepath = Path(filepath)
-
-        # Create dictionary of book data
-        book_data = {
+    def _to_dict(self) -> dict:
+        """Return the book data that is saved to JSON."""
+        return {
             "title": self.title,
-            "pages": self.pages,
+            "pages": list(self.pages),
             "title_illustration": self.title_illustration,
-            "illustrations": self.illustrations,
+            "illustrations": list(self.illustrations),
             "lora": self.lora,
             "author": self.author,
-            "illustration_prompts": self.illustration_prompts,
+            "illustration_prompts": list(self.illustration_prompts),
             "title_illustration_prompt": self.title_illustration_prompt,
         }
 
-        # Save to JSON file
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(book_data, f, indent=2, ensure_ascii=False)
+    @classmethod
+    def _from_dict(cls, book_data: dict) -> "Book":
+        """Create a book from data returned by `_to_dict`."""
+        return cls(
+            title=book_data["title"],
+            pages=book_data["pages"],
+            title_illustration=book_data["title_illustration"],
+            illustrations=book_data["illustrations"],
+            lora=book_data["lora"],
+            author=book_data["author"],
+            illustration_prompts=book_data["illustration_prompts"],
+            title_illustration_prompt=book_data["title_illustration_prompt"],
+        )
+
+    def _write_json(self, filepath: str | Path, data: dict | None = None) -> None:
+        """
+        Atomically write the book data to a JSON file. `data` is a snapshot taken
+        with `_to_dict`, defaulting to the current state of the book.
+        """
+        filepath = Path(filepath)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(filepath, "w", encoding="utf-8") as f:
+            json.dump(self._to_dict() if data is None else data, f, indent=2, ensure_ascii=False)
+
+    def save(self, filepath: str | Path = "book.json") -> None:
+        """
+        Save the book data to a JSON file.
 
+        Args:
+            filepath: Path where to save the JSON file. Defaults to "book.json"
+        """
+        filepath = Path(filepath)
+        self._write_json(filepath)
         print(f"Book saved to: {filepath.absolute()}")
 
     @classmethod
@@ -749,15 +1536,76 @@ Return ONLY the illustration description, nothing else."""
             book_data = json.load(f)
 
         # Create new book instance with loaded data
-        book = cls(
-            title=book_data["title"],
-            pages=book_data["pages"],
-            title_illustration=book_data["title_illustration"],
-            illustrations=book_data["illustrations"],
-            lora=book_data["lora"],
-            author=book_data["author"],
-            illustration_prompts=book_data["illustration_prompts"],
-            title_illustration_prompt=book_data["title_illustration_prompt"],
-        )
+        book = cls._from_dict(book_data)
+
+        missing = [
+            illustration
+            for illustration in [book.title_illustration, *book.illustrations]
+            if isinstance(illustration, str) and not os.path.exists(illustration)
+        ]
+        if missing:
+            warnings.warn(
+                f"{len(missing)} illustration(s) referenced by {filepath} do not exist, "
+                f"e.g. {missing[0]}. Use `save_bundle` to move books between machines."
+            )
+
+        return book
+
+    def save_bundle(self, filepath: str | Path = "book.drawbook") -> Path:
+        """
+        Save the book and all of its illustrations to a single bundle file, so it can
+        be moved between machines. Identical illustrations are stored once.
 
+        Args:
+            filepath: Path where to save the bundle. Defaults to "book.drawbook"
+
+        Returns:
+            The absolute path of the bundle.
+        """
+        path = save_bundle(self, filepath)
+        print(f"Book saved to: {path}")
+        return path
+
+    @classmethod
+    def load_bundle(cls, filepath: str | Path = "book.drawbook") -> "Book":
+        """
+        Load a book from a bundle file. Only the metadata is read up front; each
+        illustration is read from the bundle the first time it is needed.
+
+        Args:
+            filepath: Path to the bundle to load. Defaults to "book.drawbook"
+
+        Returns:
+            A new Book instance with the loaded data
+        """
+        filepath = Path(filepath)
+        if not filepath.exists():
+            raise FileNotFoundError(f"No book bundle found at: {filepath}")
+
+        reader = BundleReader(filepath)
+        book = cls._from_dict(reader.read_metadata())
+        book._bundle = reader
         return book
+
+    def _illustration_file(self, illustration):
+        """
+        Return the path of an illustration, extracting it from the book's bundle first
+        if it was loaded lazily. Other values are returned unchanged.
+        """
+        if (
+            self._bundle is not None
+            and isinstance(illustration, str)
+            and self._bundle.owns(illustration)
+        ):
+            return self._bundle.extract(illustration)
+        return illustration
+
+    def _read_illustration(self, illustration: str) -> bytes:
+        """Return the bytes of an illustration, reading lazily loaded ones from the bundle."""
+        if (
+            self._bundle is not None
+            and self._bundle.owns(illustration)
+            and not os.path.exists(illustration)
+        ):
+            return self._bundle.read(illustration)
+        return Path(illustration).read_bytes()
@@ -0,0 +1,35 @@
+"""
+Exclusive advisory file locks, used to coordinate processes on the same host.
+"""
+
+import os
+
+if os.name == "nt":
+    import msvcrt
+
+    def lock_file(f) -> None:
+        """Block until the exclusive lock on the open file `f` is acquired."""
+        f.seek(0)
+        while True:
+            try:
+                # LK_LOCK gives up after about 10 seconds, so keep trying
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def unlock_file(f) -> None:
+        """Release the lock on `f` taken with `lock_file`."""
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def lock_file(f) -> None:
+        """Block until the exclusive lock on the open file `f` is acquired."""
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def unlock_file(f) -> None:
+        """Release the lock on `f` taken with `lock_file`."""
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
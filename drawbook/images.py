@@ -0,0 +1,204 @@
+"""
+Helpers for writing and converting illustration images.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+import hashlib
+import io
+import os
+import tempfile
+
+from .atomic import write_atomic
+
+if TYPE_CHECKING:
+    import requests
+    from .cache import ImageCache
+
+
+# Magic numbers of the image formats the inference endpoints return
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+]
+
+# File extensions used for each output format
+EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp", "gif": "gif"}
+
+
+def sniff_format(header: bytes) -> str | None:
+    """Return the image format identified by the first bytes of a file, or None."""
+    for signature, image_format in _SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def normalize_format(image_format: str) -> str:
+    """Return the canonical lowercase name of an image format, e.g. 'jpg' -> 'jpeg'."""
+    image_format = image_format.lower().lstrip(".")
+    return "jpeg" if image_format == "jpg" else image_format
+
+
+def save_response_image(
+    response: "requests.Response",
+    path: str | Path,
+    image_format: str = "png",
+    size: tuple[int, int] | None = None,
+    chunk_size: int = 64 * 1024,
+) -> int:
+    """
+    Write the image in an HTTP response body to `path`.
+
+    When the body is already in `image_format` and no `size` is requested, the
+    bytes are streamed straight to disk and only the header is inspected.
+    Otherwise the image is decoded and re-encoded with Pillow.
+
+    Args:
+        response: A successful response whose body is an image.
+        path: Where to write the image.
+        image_format: The format to store the image in, e.g. "png" or "jpeg".
+        size: Optional (width, height) to resize the image to.
+        chunk_size: Number of bytes read from the response at a time.
+
+    Returns:
+        The number of bytes received from the server.
+    """
+    path = Path(path)
+    image_format = normalize_format(image_format)
+    chunks = response.iter_content(chunk_size=chunk_size)
+
+    # Read enough of the body to identify the format from its magic number
+    header = b""
+    for chunk in chunks:
+        header += chunk
+        if len(header) >= 16:
+            break
+    source_format = sniff_format(header)
+    if source_format is None:
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        raise ValueError(
+            f"Response is not a supported image (Content-Type: {content_type or 'unknown'})"
+        )
+
+    received = len(header)
+    if source_format == image_format and size is None:
+
+        def body():
+            nonlocal received
+            yield header
+            for chunk in chunks:
+                received += len(chunk)
+                yield chunk
+
+        write_atomic(path, body())
+        return received
+
+    buffer = io.BytesIO(header)
+    for chunk in chunks:
+        buffer.write(chunk)
+    return save_image_bytes(buffer.getvalue(), path, image_format, size)
+
+
+def save_image_bytes(
+    data: bytes,
+    path: str | Path,
+    image_format: str = "png",
+    size: tuple[int, int] | None = None,
+) -> int:
+    """
+    Write an image that has been read into memory to `path`, like `save_response_image`.
+    The bytes are written as-is when they are already in `image_format` and no `size`
+    is requested.
+
+    Returns:
+        The number of bytes in `data`.
+    """
+    path = Path(path)
+    image_format = normalize_format(image_format)
+    source_format = sniff_format(data[:16])
+    if source_format is None:
+        raise ValueError("Response is not a supported image")
+    if source_format == image_format and size is None:
+        write_atomic(path, [data])
+        return len(data)
+
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    if size is not None:
+        image = image.resize(size)
+    if image_format == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format=image_format.upper())
+    write_atomic(path, [output.getvalue()])
+    return len(data)
+
+
+def _optimized_format(image_format: str) -> str:
+    image_format = normalize_format(image_format)
+    if image_format not in ("jpeg", "png"):
+        raise ValueError(f"Unsupported optimized image format: {image_format!r}")
+    return image_format
+
+
+def optimize_image(
+    source: str | Path,
+    max_size: int,
+    image_format: str = "jpeg",
+    quality: int = 85,
+    cache: "ImageCache | None" = None,
+) -> Path:
+    """
+    Downscale an illustration so that neither side exceeds `max_size` pixels and
+    re-encode it, returning the path of the optimized image. Optimized variants are
+    cached by a hash of the source bytes and the settings, so re-exports reuse them.
+
+    Args:
+        source: Path of the image to optimize.
+        max_size: Maximum width and height in pixels. Smaller images are not upscaled.
+        image_format: "jpeg" or "png", otherwise a ValueError is raised. Images with
+                      transparency are always stored as PNG.
+        quality: JPEG quality from 1 to 100.
+        cache: Cache for optimized images. Defaults to the `optimized` folder inside
+               `default_cache_dir()`.
+    """
+    from PIL import Image
+    from .cache import ImageCache, default_cache_dir
+
+    image_format = _optimized_format(image_format)
+    cache = cache or ImageCache(default_cache_dir() / "optimized")
+    source_hash = hashlib.sha256(Path(source).read_bytes()).hexdigest()
+    key = ImageCache.make_key(
+        "optimized",
+        source_hash,
+        {"max_size": max_size, "format": image_format, "quality": quality},
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    with Image.open(source) as image:
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        if image.mode in ("RGBA", "LA") and image.getchannel("A").getextrema() == (255, 255):
+            # Fully opaque alpha channels are dropped so the image can be stored as JPEG
+            image = image.convert("RGB")
+        if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+            image_format = "png"
+        elif image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        fd, tmp_path = tempfile.mkstemp(suffix=f".{EXTENSIONS[image_format]}")
+        os.close(fd)
+        try:
+            if image_format == "jpeg":
+                image.save(tmp_path, format="JPEG", quality=quality, optimize=True)
+            else:
+                image.save(tmp_path, format="PNG", optimize=True)
+            return cache.put(key, tmp_path)
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
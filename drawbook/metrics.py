@@ -0,0 +1,203 @@
+"""
+Structured timing events for the stages of illustrating, rendering and exporting books.
+
+drawbook emits an `Event` for every prompt model call, image request, retry, cache
+hit, export and preview. Register a listener to receive them:
+
+    with collect_metrics() as metrics:
+        book.illustrate()
+        book.export("book.pptx")
+    print(metrics.summary())
+
+Events emitted:
+    prompt.chat         A call to the prompt model (model, max_tokens, chars, and page for
+                        single pages in `illustrate` or pages for batched requests).
+    prompt.cache_hit    An illustration prompt answered from the prompt cache.
+    image.generate      An image generation request, including retries (page, bytes).
+    image.cache_hit     An illustration copied from the image cache (page).
+    http.retry          A retried request (url, attempt, delay, reason).
+    singleflight.shared A request answered by an identical one already running (kind).
+    illustrate.page     Everything done for one page in `illustrate` (page, ok).
+    export              `Book.export` (pages, bytes).
+    export_pdf          `Book.export_pdf` (pages).
+    create_preview      `Book.create_preview` (pages, rendered).
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+import threading
+import time
+
+
+@dataclass
+class Event:
+    """
+    Something that happened while working on a book.
+
+    Args:
+        name: The kind of event, e.g. "image.generate".
+        start: Wall-clock time (seconds since the epoch) the event started at.
+        duration: How long the event took in seconds, or None for instantaneous events.
+        attributes: Details of the event, e.g. the page or the number of bytes received.
+    """
+
+    name: str
+    start: float
+    duration: float | None = None
+    attributes: dict = field(default_factory=dict)
+
+
+_listeners: List[Callable[[Event], None]] = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(listener: Callable[[Event], None]) -> None:
+    """
+    Call `listener` with every event from now on. Listeners may be called from
+    worker threads, so they must be thread-safe.
+    """
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[Event], None]) -> None:
+    """Stop calling `listener` with events."""
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def enabled() -> bool:
+    """Return whether any listener is registered, i.e. whether events are recorded."""
+    return bool(_listeners)
+
+
+def emit(name: str, duration: float | None = None, **attributes) -> None:
+    """Send an event that just finished, after taking `duration` seconds, to every listener."""
+    if not _listeners:
+        return
+    now = time.time()
+    event = Event(name, now - (duration or 0.0), duration, attributes)
+    for listener in list(_listeners):
+        try:
+            listener(event)
+        except Exception as e:
+            print(f"Warning: Metrics listener {listener!r} failed: {e}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the body of the `with` statement and emit it as an event. The yielded dict
+    holds the event's attributes and can be updated by the body. An `error` attribute
+    is added if the body raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        emit(name, time.perf_counter() - start, **attributes)
+
+
+class Metrics:
+    """
+    A listener that keeps every event and aggregates durations and counters per
+    event name. It is thread-safe.
+    """
+
+    def __init__(self):
+        self.events: List[Event] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def by_name(self, name: str) -> List[Event]:
+        """Return the recorded events called `name`."""
+        with self._lock:
+            return [event for event in self.events if event.name == name]
+
+    def total(self, name: str, attribute: str) -> float:
+        """Return the sum of a numeric attribute over the events called `name`."""
+        return sum(event.attributes.get(attribute) or 0 for event in self.by_name(name))
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Return, for every event name, the number of events and the total, mean, median,
+        95th percentile and maximum duration in seconds.
+        """
+        with self._lock:
+            events = list(self.events)
+        durations = {}
+        for event in events:
+            durations.setdefault(event.name, []).append(event.duration)
+
+        summary = {}
+        for name, values in durations.items():
+            timed = sorted(value for value in values if value is not None)
+            stats = {"count": len(values)}
+            if timed:
+                stats.update(
+                    total=sum(timed),
+                    mean=sum(timed) / len(timed),
+                    p50=timed[len(timed) // 2],
+                    p95=timed[min(len(timed) - 1, int(len(timed) * 0.95))],
+                    max=timed[-1],
+                )
+            summary[name] = stats
+        return summary
+
+
+@contextmanager
+def collect_metrics():
+    """Record the events emitted in the body of the `with` statement into a `Metrics`."""
+    metrics = Metrics()
+    add_listener(metrics)
+    try:
+        yield metrics
+    finally:
+        remove_listener(metrics)
+
+
+class OpenTelemetryExporter:
+    """
+    A listener that exports events as OpenTelemetry spans. Requires the
+    `opentelemetry-api` package and a configured tracer provider, unless a
+    tracer is passed in.
+
+        add_listener(OpenTelemetryExporter())
+    """
+
+    def __init__(self, tracer=None):
+        """
+        Args:
+            tracer: The tracer to create spans with. Defaults to the "drawbook" tracer
+                    of the global tracer provider.
+        """
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError as e:
+                raise ImportError(
+                    "OpenTelemetryExporter requires the opentelemetry-api package: "
+                    "`pip install opentelemetry-api`"
+                ) from e
+            tracer = trace.get_tracer("drawbook")
+        self.tracer = tracer
+
+    def __call__(self, event: Event) -> None:
+        start_ns = int(event.start * 1e9)
+        attributes = {
+            key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in event.attributes.items()
+            if value is not None
+        }
+        otel_span = self.tracer.start_span(
+            f"drawbook.{event.name}", start_time=start_ns, attributes=attributes
+        )
+        otel_span.end(end_time=start_ns + int((event.duration or 0.0) * 1e9))
@@ -0,0 +1,133 @@
+"""
+A minimal PDF writer that streams one full-page image per page.
+"""
+
+from typing import BinaryIO, Literal
+import io
+import zlib
+
+
+COMPRESSIONS = ("jpeg", "flate")
+
+
+class PDFWriter:
+    """
+    Writes a multi-page PDF in which every page is a single image. Each page is
+    encoded and written as soon as it is added, so only the page being added is
+    held in memory, however many pages the document has.
+
+    Example:
+        with open("book.pdf", "wb") as f, PDFWriter(f) as pdf:
+            for image in pages:
+                pdf.add_page(image, dpi=192)
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        compression: Literal["jpeg", "flate"] = "jpeg",
+        quality: int = 85,
+    ):
+        """
+        Args:
+            fileobj: A writable binary file-like object.
+            compression: "jpeg" for lossy DCT compression, or "flate" for lossless
+                         zlib compression of the raw pixels.
+            quality: JPEG quality from 1 to 100.
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported PDF compression: {compression!r}")
+        self.fileobj = fileobj
+        self.compression = compression
+        self.quality = quality
+        self._offsets = {}
+        self._position = 0
+        self._page_ids = []
+        # Objects 1 and 2 are the catalog and page tree, written when the PDF is closed
+        self._next_id = 3
+        self._closed = False
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data: bytes) -> None:
+        self.fileobj.write(data)
+        self._position += len(data)
+
+    def _allocate(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _write_object(self, obj_id: int, body: bytes, stream: bytes | None = None) -> None:
+        self._offsets[obj_id] = self._position
+        self._write(b"%d 0 obj\n" % obj_id + body)
+        if stream is not None:
+            self._write(b"\nstream\n")
+            self._write(stream)
+            self._write(b"\nendstream")
+        self._write(b"\nendobj\n")
+
+    def _encode(self, image) -> tuple[bytes, bytes]:
+        if self.compression == "jpeg":
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=self.quality)
+            return buffer.getvalue(), b"/DCTDecode"
+        return zlib.compress(image.tobytes(), 6), b"/FlateDecode"
+
+    def add_page(self, image, dpi: float = 72) -> None:
+        """
+        Add a page showing `image`, sized so that the image is displayed at `dpi`.
+
+        Args:
+            image: A PIL image. It is converted to RGB if needed.
+            dpi: Resolution of the image on the page, which sets the page size.
+        """
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        width, height = image.size
+        data, image_filter = self._encode(image)
+        page_width, page_height = width * 72 / dpi, height * 72 / dpi
+
+        image_id, content_id, page_id = (self._allocate() for _ in range(3))
+        self._write_object(
+            image_id,
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+            b"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter %s /Length %d >>"
+            % (width, height, image_filter, len(data)),
+            data,
+        )
+        content = b"q %.4f 0 0 %.4f 0 0 cm /Im0 Do Q" % (page_width, page_height)
+        self._write_object(content_id, b"<< /Length %d >>" % len(content), content)
+        self._write_object(
+            page_id,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.4f %.4f] "
+            b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+            % (page_width, page_height, image_id, content_id),
+        )
+        self._page_ids.append(page_id)
+
+    def close(self) -> None:
+        """Write the page tree, cross-reference table and trailer."""
+        if self._closed:
+            return
+        self._closed = True
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._write_object(
+            2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids))
+        )
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_position = self._position
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % self._next_id)
+        for obj_id in range(1, self._next_id):
+            self._write(b"%010d 00000 n \n" % self._offsets[obj_id])
+        self._write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (self._next_id, xref_position)
+        )
+
+    def __enter__(self) -> "PDFWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
@@ -0,0 +1,245 @@
+"""
+Token-bucket rate limits for the inference endpoints, optionally shared between
+processes on the same host.
+"""
+
+from pathlib import Path
+from typing import Dict
+import contextlib
+import struct
+import threading
+import time
+
+from .cache import default_cache_dir
+from .filelock import lock_file, unlock_file
+
+
+ENDPOINTS = ("chat", "image")
+
+# tokens, time of the last refill, time before which no request may be sent
+_STATE = struct.Struct("<ddd")
+
+
+class TokenBucket:
+    """
+    A token bucket that refills at `rate` tokens per second, up to `burst` tokens.
+    Every request takes one token, and callers wait while the bucket is empty.
+
+    This bucket is shared by the threads of one process. Use `FileTokenBucket` to
+    share a bucket between processes.
+    """
+
+    # Whether updating the state blocks on I/O, so coroutines must do it in a thread
+    _blocking = False
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        """
+        Args:
+            rate: Tokens added per second, i.e. the sustained request rate.
+            burst: Maximum number of tokens, i.e. how many requests may be sent
+                   back to back after an idle period.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._state = (self.burst, time.time(), 0.0)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _locked_state(self):
+        # Yields a one-item list holding the state, which may be replaced in place
+        with self._lock:
+            holder = [self._state]
+            yield holder
+            self._state = holder[0]
+
+    def _take(self, now: float) -> float:
+        """Take a token if one is available and return 0, or return how long to wait."""
+        with self._locked_state() as holder:
+            tokens, updated, blocked_until = holder[0]
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            if now < blocked_until:
+                wait = blocked_until - now
+            elif tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+            holder[0] = (tokens, max(updated, now), blocked_until)
+            return wait
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """
+        Wait until a request may be sent and take a token for it.
+
+        Args:
+            timeout: Maximum number of seconds to wait, or None to wait as long as needed.
+
+        Returns:
+            True once a token was taken, or False if `timeout` expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take(time.time())
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Wait without blocking the event loop until a request may be sent, and take a token."""
+        import asyncio
+
+        while True:
+            if self._blocking:
+                wait = await asyncio.to_thread(self._take, time.time())
+            else:
+                wait = self._take(time.time())
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every request for `seconds`, e.g. after the server answered 429,
+        so that other workers don't keep hitting the limit in the meantime.
+        """
+        now = time.time()
+        with self._locked_state() as holder:
+            tokens, updated, blocked_until = holder[0]
+            # Once the pause is over a single request goes through, and the rest are
+            # paced at the sustained rate instead of bursting again
+            resume = max(blocked_until, now + seconds)
+            holder[0] = (min(tokens, 1.0), max(updated, resume), resume)
+
+    async def apause(self, seconds: float) -> None:
+        """The coroutine version of `pause`."""
+        import asyncio
+
+        if self._blocking:
+            await asyncio.to_thread(self.pause, seconds)
+        else:
+            self.pause(seconds)
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    A token bucket whose state is kept in a small file and updated under an
+    exclusive file lock, so that every process using the same file shares one rate.
+    """
+
+    _blocking = True
+
+    def __init__(self, rate: float, burst: float = 1.0, path: str | Path | None = None):
+        """
+        Args:
+            rate: Tokens added per second, i.e. the sustained request rate.
+            burst: Maximum number of tokens.
+            path: File holding the bucket state. Processes using the same file share
+                  the bucket. Defaults to `ratelimit/default.bucket` inside
+                  `default_cache_dir()`.
+        """
+        super().__init__(rate, burst)
+        self.path = Path(path or default_cache_dir() / "ratelimit" / "default.bucket")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked_state(self):
+        with self._lock, open(self.path, "a+b") as f:
+            lock_file(f)
+            try:
+                f.seek(0)
+                data = f.read(_STATE.size)
+                if len(data) == _STATE.size:
+                    state = _STATE.unpack(data)
+                else:
+                    state = (self.burst, time.time(), 0.0)
+                holder = [state]
+                yield holder
+                if holder[0] != state:
+                    f.seek(0)
+                    f.truncate()
+                    f.write(_STATE.pack(*holder[0]))
+                    f.flush()
+            finally:
+                unlock_file(f)
+
+
+_limiters: Dict[str, TokenBucket] = {}
+
+
+def set_rate_limit(
+    endpoint: str,
+    requests_per_minute: float | None,
+    burst: float = 1.0,
+    shared: bool = False,
+    path: str | Path | None = None,
+) -> TokenBucket | None:
+    """
+    Limit the rate of requests sent to an inference endpoint by this process, or by
+    every process on this host when `shared` is set.
+
+    Args:
+        endpoint: "chat" for illustration prompt extraction, or "image" for image generation.
+        requests_per_minute: The sustained request rate, or None to remove the limit.
+        burst: How many requests may be sent back to back after an idle period.
+        shared: If True, the limit is shared through a lock file with every other
+                process that sets a shared limit for the same endpoint.
+        path: File holding the shared bucket state. Defaults to
+              `ratelimit/<endpoint>.bucket` inside `default_cache_dir()`.
+
+    Returns:
+        The new limiter, or None if the limit was removed.
+    """
+    if endpoint not in ENDPOINTS:
+        raise ValueError(f"Unknown endpoint {endpoint!r}, expected one of {ENDPOINTS}")
+    if requests_per_minute is None:
+        _limiters.pop(endpoint, None)
+        return None
+    rate = requests_per_minute / 60
+    if shared:
+        limiter = FileTokenBucket(
+            rate, burst, path or default_cache_dir() / "ratelimit" / f"{endpoint}.bucket"
+        )
+    else:
+        limiter = TokenBucket(rate, burst)
+    _limiters[endpoint] = limiter
+    return limiter
+
+
+def get_rate_limit(endpoint: str) -> TokenBucket | None:
+    """Return the limiter of an endpoint, or None if it isn't rate limited."""
+    return _limiters.get(endpoint)
+
+
+def acquire(endpoint: str) -> None:
+    """Wait until a request may be sent to `endpoint`, if it is rate limited."""
+    limiter = _limiters.get(endpoint)
+    if limiter is not None:
+        limiter.acquire()
+
+
+async def aacquire(endpoint: str) -> None:
+    """The coroutine version of `acquire`."""
+    limiter = _limiters.get(endpoint)
+    if limiter is not None:
+        await limiter.aacquire()
+
+
+def pause(endpoint: str, seconds: float) -> None:
+    """Hold back requests to `endpoint` for `seconds`, if it is rate limited."""
+    limiter = _limiters.get(endpoint)
+    if limiter is not None:
+        limiter.pause(seconds)
+
+
+async def apause(endpoint: str, seconds: float) -> None:
+    """The coroutine version of `pause`."""
+    limiter = _limiters.get(endpoint)
+    if limiter is not None:
+        await limiter.apause(seconds)
@@ -0,0 +1,283 @@
+"""
+Rendering of page previews, and the resources shared between renders.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Literal
+import io
+import os
+import textwrap
+import threading
+
+
+# Fonts tried in order when rendering previews. Trebuchet MS matches the exported
+# slides; the rest are common fallbacks on macOS, Windows and Linux servers.
+FONT_FALLBACKS = [
+    "Trebuchet MS",
+    "trebuc.ttf",
+    "Arial",
+    "arial.ttf",
+    "DejaVuSans.ttf",
+    "LiberationSans-Regular.ttf",
+    "FreeSans.ttf",
+]
+
+
+@lru_cache(maxsize=None)
+def get_font(size: int):
+    """
+    Return the first font in `FONT_FALLBACKS` that can be loaded at `size`, falling
+    back to Pillow's built-in font. Fonts are loaded once per process.
+    """
+    from PIL import ImageFont
+
+    for name in FONT_FALLBACKS:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 has no scalable default font
+        return ImageFont.load_default()
+
+
+class IllustrationCache:
+    """
+    An in-memory LRU cache of illustrations resized for previews, keyed by the file's
+    path, modification time and target size, so an illustration that is regenerated
+    in place is reloaded.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        """
+        Args:
+            max_entries: Maximum number of resized illustrations kept in memory.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str | Path, size: tuple[int, int]):
+        """
+        Return the illustration at `path` resized to `size`. The returned image is
+        shared between callers and must not be modified.
+        """
+        key = (str(path), os.stat(path).st_mtime_ns, tuple(size))
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                return image
+
+        image = _load_illustration(path, size)
+
+        with self._lock:
+            self._entries[key] = image
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return image
+
+    def clear(self) -> None:
+        """Drop every cached illustration."""
+        with self._lock:
+            self._entries.clear()
+
+
+illustration_cache = IllustrationCache()
+
+
+def _load_illustration(path: str | Path, size: tuple[int, int]):
+    from PIL import Image
+
+    with Image.open(path) as illust:
+        return illust.resize(size)
+
+
+# Page layout, matching the PowerPoint dimensions and positioning
+PAGE_WIDTH = 1920
+PAGE_HEIGHT = 1080
+ILLUSTRATION_WIDTH = 840
+ILLUSTRATION_HEIGHT = 840
+ILLUSTRATION_X = (PAGE_WIDTH - ILLUSTRATION_WIDTH) // 2
+ILLUSTRATION_Y = 120
+# Resolution at which a page is 10 inches wide, matching the exported slides
+NATIVE_DPI = 192
+
+
+def _paste_illustration(
+    page, illustration: str | Path, description: str, cache_illustrations: bool = True
+) -> None:
+    size = (ILLUSTRATION_WIDTH, ILLUSTRATION_HEIGHT)
+    try:
+        if cache_illustrations:
+            illust = illustration_cache.get(illustration, size)
+        else:
+            illust = _load_illustration(illustration, size)
+        page.paste(illust, (ILLUSTRATION_X, ILLUSTRATION_Y))
+    except Exception as e:
+        print(f"Warning: Could not add {description}: {e}")
+
+
+def render_title_page(
+    title: str,
+    author: str | None = None,
+    illustration: str | Path | None = None,
+    cache_illustrations: bool = True,
+):
+    """
+    Render the title page preview as a PIL image. The resized illustration is kept in
+    `illustration_cache` unless `cache_illustrations` is False.
+    """
+    from PIL import Image, ImageDraw
+
+    page = Image.new("RGB", (PAGE_WIDTH, PAGE_HEIGHT), "white")
+    draw = ImageDraw.Draw(page)
+
+    # Add maroon border on left
+    draw.rectangle([(0, 0), (38, PAGE_HEIGHT)], fill=(128, 0, 0))
+
+    # Add title illustration if available
+    if isinstance(illustration, (str, Path)):
+        _paste_illustration(page, illustration, "title illustration", cache_illustrations)
+
+    # Add title text
+    title_font = get_font(96)
+    title_y = 40
+    bbox = draw.textbbox((0, 0), title, font=title_font)
+    title_width = bbox[2] - bbox[0]
+    draw.text(
+        ((PAGE_WIDTH - title_width) // 2, title_y),
+        title,
+        font=title_font,
+        fill="black",
+    )
+
+    # Add author if available
+    if author:
+        author_font = get_font(48)
+        author_text = f"Written by {author}"
+        bbox = draw.textbbox((0, 0), author_text, font=author_font)
+        author_width = bbox[2] - bbox[0]
+        draw.text(
+            ((PAGE_WIDTH - author_width) // 2, PAGE_HEIGHT - 100),
+            author_text,
+            font=author_font,
+            fill="black",
+        )
+
+    return page
+
+
+def render_content_page(
+    page_number: int,
+    text: str,
+    illustration: str | Path | None = None,
+    cache_illustrations: bool = True,
+):
+    """
+    Render the preview of a content page (numbered from 1) as a PIL image. The resized
+    illustration is kept in `illustration_cache` unless `cache_illustrations` is False.
+    """
+    from PIL import Image, ImageDraw
+
+    page = Image.new("RGB", (PAGE_WIDTH, PAGE_HEIGHT), "white")
+    draw = ImageDraw.Draw(page)
+
+    # Add illustration if available
+    if isinstance(illustration, (str, Path)):
+        _paste_illustration(
+            page, illustration, f"illustration on page {page_number}", cache_illustrations
+        )
+
+    # Add text
+    body_font = get_font(48)
+    text_y = 50
+    wrapped_text = textwrap.fill(text, width=50)
+    bbox = draw.textbbox((0, 0), wrapped_text, font=body_font)
+    text_width = bbox[2] - bbox[0]
+    draw.text(
+        ((PAGE_WIDTH - text_width) // 2, text_y),
+        wrapped_text,
+        font=body_font,
+        fill="black",
+        align="center",
+    )
+
+    # Add page number
+    page_num_font = get_font(29)
+    page_num_text = str(page_number)
+    bbox = draw.textbbox((0, 0), page_num_text, font=page_num_font)
+    page_num_width = bbox[2] - bbox[0]
+    draw.text(
+        ((PAGE_WIDTH - page_num_width) // 2, PAGE_HEIGHT - 100),
+        page_num_text,
+        font=page_num_font,
+        fill="black",
+    )
+
+    return page
+
+
+def render_page(spec: tuple, cache_illustrations: bool = True):
+    """
+    Render a page from its spec, which is either ("title", title, author, illustration)
+    or ("content", page_number, text, illustration). Pages rendered only once, e.g. for
+    a PDF, should pass `cache_illustrations=False` to keep memory use low.
+    """
+    if spec[0] == "title":
+        return render_title_page(*spec[1:], cache_illustrations=cache_illustrations)
+    return render_content_page(*spec[1:], cache_illustrations=cache_illustrations)
+
+
+def render_page_encoded(spec: tuple) -> bytes:
+    """
+    Render a page from its spec and return it as PNG bytes. Used by worker processes,
+    where sending back a fast-compressed PNG is much cheaper than pickling the image.
+    """
+    buffer = io.BytesIO()
+    render_page(spec).save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def decode_page(data: bytes):
+    """Decode PNG bytes returned by `render_page_encoded` into a PIL image."""
+    from PIL import Image
+
+    page = Image.open(io.BytesIO(data))
+    page.load()
+    return page
+
+
+def render_pages(
+    specs: List[tuple],
+    max_workers: int = 1,
+    executor: Literal["process", "thread"] = "process",
+) -> Iterator:
+    """
+    Render several page specs, yielding the PIL images in order.
+
+    Args:
+        specs: The page specs to render, see `render_page`.
+        max_workers: Maximum number of pages rendered in parallel.
+        executor: "process" renders pages in a process pool, which scales with the
+                  number of cores. "thread" uses a thread pool, which avoids process
+                  startup and only runs in parallel while Pillow releases the GIL.
+    """
+    if max_workers <= 1 or len(specs) <= 1:
+        for spec in specs:
+            yield render_page(spec)
+        return
+
+    max_workers = min(max_workers, len(specs))
+    if executor == "thread":
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            yield from pool.map(render_page, specs)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for data in pool.map(render_page_encoded, specs):
+                yield decode_page(data)
@@ -0,0 +1,236 @@
+"""
+Pooled HTTP session with retries for calls to the inference endpoints.
+"""
+
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Callable
+import random
+import threading
+import time
+
+from . import metrics, ratelimit
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+
+@dataclass
+class RetryPolicy:
+    """
+    How requests to the inference endpoints are retried.
+
+    Args:
+        max_retries: Maximum number of retries after the first attempt.
+        backoff_base: Delay in seconds before the first retry, doubled on every retry.
+        backoff_max: Upper bound in seconds for any single delay, including delays
+                     requested by the server through `Retry-After` or `estimated_time`.
+        connect_timeout: Seconds to wait for a connection to be established.
+        read_timeout: Seconds to wait for the server to send a response.
+        retry_statuses: HTTP status codes that are retried.
+    """
+
+    max_retries: int = 5
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 300.0
+    retry_statuses: frozenset = field(
+        default_factory=lambda: frozenset({408, 429, 500, 502, 503, 504})
+    )
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_maxsize: int = 32) -> "requests.Session":
+    """
+    Return the HTTP session shared by every Book in this process. Connections are
+    kept alive and pooled, so successive requests to the same host skip the TCP
+    and TLS handshakes.
+
+    Args:
+        pool_maxsize: Maximum number of connections kept open per host. Only used
+                      when the session is first created.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def server_delay(response: "requests.Response") -> float | None:
+    """Return the delay the server asked for via `Retry-After` or `estimated_time`."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    # The Inference API answers 503 with an estimate while a model is being loaded
+    if response.status_code == 503:
+        try:
+            estimated_time = response.json().get("estimated_time")
+        except (ValueError, AttributeError):
+            estimated_time = None
+        if isinstance(estimated_time, (int, float)):
+            return max(0.0, float(estimated_time))
+    return None
+
+
+def _retry_delay(response, policy: RetryPolicy, attempt: int) -> float:
+    """Return how long to wait before retrying a request that got `response`."""
+    delay = server_delay(response)
+    if delay is not None:
+        return min(delay, policy.backoff_max)
+    return policy.backoff(attempt)
+
+
+def post_with_retry(
+    url: str,
+    headers: dict | None = None,
+    json: dict | None = None,
+    policy: RetryPolicy | None = None,
+    stream: bool = False,
+    on_retry: Callable[[int, float, str], None] | None = None,
+    endpoint: str | None = None,
+) -> "requests.Response":
+    """
+    POST to `url` through the shared session, retrying connection errors, timeouts
+    and retryable status codes with exponential backoff. `Retry-After` headers and
+    the model-loading `estimated_time` are honored.
+
+    Args:
+        url: The URL to post to.
+        headers: Optional request headers.
+        json: Optional JSON body.
+        policy: Retry and timeout settings. Defaults to `RetryPolicy()`.
+        stream: If True, the response body is not read up front.
+        on_retry: Optional callback called with the retry number, the delay in
+                  seconds and the reason before each retry.
+        endpoint: Optional rate-limited endpoint ("chat" or "image") the request is
+                  sent to, see `ratelimit.set_rate_limit`. Every attempt waits for
+                  the limiter, and a 429 response holds back all requests to the
+                  endpoint until the server's delay has passed.
+
+    Returns:
+        The last response received. It may have a non-200 status if the retries
+        were exhausted.
+    """
+    import requests
+
+    policy = policy or RetryPolicy()
+    session = get_session()
+    attempt = 0
+    while True:
+        if endpoint is not None:
+            ratelimit.acquire(endpoint)
+        try:
+            response = session.post(
+                url,
+                headers=headers,
+                json=json,
+                stream=stream,
+                timeout=(policy.connect_timeout, policy.read_timeout),
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= policy.max_retries:
+                raise
+            delay, reason = policy.backoff(attempt), f"{type(e).__name__}: {e}"
+        else:
+            if (
+                response.status_code not in policy.retry_statuses
+                or attempt >= policy.max_retries
+            ):
+                return response
+            delay = _retry_delay(response, policy, attempt)
+            reason = f"HTTP {response.status_code}"
+            response.close()
+            if endpoint is not None and response.status_code == 429:
+                ratelimit.pause(endpoint, delay)
+
+        attempt += 1
+        metrics.emit("http.retry", url=url, attempt=attempt, delay=delay, reason=reason)
+        if on_retry is not None:
+            on_retry(attempt, delay, reason)
+        time.sleep(delay)
+
+
+async def apost_with_retry(
+    client: "httpx.AsyncClient",
+    url: str,
+    headers: dict | None = None,
+    json: dict | None = None,
+    policy: RetryPolicy | None = None,
+    on_retry: Callable[[int, float, str], None] | None = None,
+    endpoint: str | None = None,
+) -> "httpx.Response":
+    """
+    The coroutine version of `post_with_retry`, sending the request through an
+    `httpx.AsyncClient`. Retries, timeouts and rate limits behave the same way, and
+    the response body is read before it is returned.
+
+    Args:
+        client: The async HTTP client to send the request with.
+        url: The URL to post to.
+        headers: Optional request headers.
+        json: Optional JSON body.
+        policy: Retry and timeout settings. Defaults to `RetryPolicy()`.
+        on_retry: Optional callback called with the retry number, the delay in
+                  seconds and the reason before each retry.
+        endpoint: Optional rate-limited endpoint ("chat" or "image") the request is
+                  sent to, see `post_with_retry`.
+
+    Returns:
+        The last response received. It may have a non-200 status if the retries
+        were exhausted.
+    """
+    import asyncio
+    import httpx
+
+    policy = policy or RetryPolicy()
+    timeout = httpx.Timeout(policy.read_timeout, connect=policy.connect_timeout)
+    attempt = 0
+    while True:
+        if endpoint is not None:
+            await ratelimit.aacquire(endpoint)
+        try:
+            response = await client.post(url, headers=headers, json=json, timeout=timeout)
+        except httpx.TransportError as e:
+            if attempt >= policy.max_retries:
+                raise
+            delay, reason = policy.backoff(attempt), f"{type(e).__name__}: {e}"
+        else:
+            if (
+                response.status_code not in policy.retry_statuses
+                or attempt >= policy.max_retries
+            ):
+                return response
+            delay = _retry_delay(response, policy, attempt)
+            reason = f"HTTP {response.status_code}"
+            if endpoint is not None and response.status_code == 429:
+                await ratelimit.apause(endpoint, delay)
+
+        attempt += 1
+        metrics.emit("http.retry", url=url, attempt=attempt, delay=delay, reason=reason)
+        if on_retry is not None:
+            on_retry(attempt, delay, reason)
+        await asyncio.sleep(delay)
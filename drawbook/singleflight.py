@@ -0,0 +1,178 @@
+"""
+Coalescing of concurrent identical requests to the inference endpoints.
+
+When several pages, workers or books ask for the same prompt or image at the same
+time, only the first caller sends the request. The others wait for it and share its
+result. With a lock directory, this extends to every process on the host: processes
+take turns on a lock for the request, and the ones that get it after the first find
+the result in the shared cache instead of requesting it again.
+"""
+
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict
+import hashlib
+import threading
+
+from . import metrics
+from .cache import default_cache_dir
+from .filelock import lock_file, unlock_file
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call at a time per key, sharing its result with every caller
+    that asked for the same key while it was running.
+    """
+
+    def __init__(self, name: str, lock_dir: str | Path | None = None):
+        """
+        Args:
+            name: Name of the kind of request, used in metrics events and as the name
+                  of the lock file.
+            lock_dir: Optional directory of the lock files that coalesce calls across
+                      processes. Without it, calls are only coalesced within this process.
+        """
+        self.name = name
+        self.lock_dir = Path(lock_dir) if lock_dir else None
+        self._calls: Dict[str, _Call] = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _lock_path(self, key: str) -> Path:
+        # Keys are spread over a fixed number of lock files, so the directory doesn't
+        # grow with every request. Each call opens its own handle, and flock locks
+        # belong to the handle, so threads of one process exclude each other too.
+        stripe = hashlib.sha256(key.encode("utf-8")).hexdigest()[:2]
+        return self.lock_dir / f"{self.name}-{stripe}.lock"
+
+    def _run(self, key: str, fn: Callable[[], Any], check: Callable[[], Any] | None):
+        # The result may have been stored by a call that finished a moment ago
+        result = check() if check else None
+        if result is not None or self.lock_dir is None:
+            return result if result is not None else fn()
+
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path(key), "a+b") as f:
+            lock_file(f)
+            try:
+                # Another process may have produced the result while we waited
+                result = check() if check else None
+                return result if result is not None else fn()
+            finally:
+                unlock_file(f)
+
+    def do(self, key: str, fn: Callable[[], Any], check: Callable[[], Any] | None = None):
+        """
+        Return `fn()`, unless a call with the same key is already running, in which
+        case wait for it and return its result (or raise its exception).
+
+        Args:
+            key: Identifies the request, e.g. a hash of the model, prompt and parameters.
+            fn: Sends the request and returns its result.
+            check: Optional function returning the result if it is already available,
+                   e.g. from a cache, or None. It is called before `fn`, and again after
+                   waiting for the lock of the key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            metrics.emit("singleflight.shared", kind=self.name)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, check)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        check: Callable[[], Any] | None = None,
+    ):
+        """
+        The coroutine version of `do`, coalescing calls made from the same event loop.
+        `fn` returns an awaitable. Lock files are not used, since waiting on them
+        would block the event loop.
+
+        If the running call is cancelled, the callers waiting for it start a new one
+        instead of being cancelled with it.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+        while True:
+            future = self._futures.get(flight)
+            if future is None:
+                break
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue
+                raise
+            metrics.emit("singleflight.shared", kind=self.name)
+            return result
+
+        future = self._futures[flight] = loop.create_future()
+        try:
+            result = check() if check else None
+            if result is None:
+                result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting, so don't let asyncio report it as unretrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._futures[flight]
+
+
+_flights = {"prompt": SingleFlight("prompt"), "image": SingleFlight("image")}
+
+
+def get_single_flight(kind: str) -> SingleFlight:
+    """Return the single-flight group of "prompt" or "image" requests."""
+    return _flights[kind]
+
+
+def enable_cross_process(lock_dir: str | Path | None = None) -> None:
+    """
+    Coalesce identical prompt and image requests across every process on this host
+    that enables it with the same lock directory. Processes share results through the
+    prompt and image caches, so those should stay enabled.
+
+    Args:
+        lock_dir: Directory of the lock files. Defaults to the `locks` folder inside
+                  `default_cache_dir()`.
+    """
+    lock_dir = Path(lock_dir or default_cache_dir() / "locks")
+    for flight in _flights.values():
+        flight.lock_dir = lock_dir
@@ -0,0 +1,157 @@
+"""
+Prebuilt XML templates for the slides created by Book.export.
+"""
+
+from copy import deepcopy
+from functools import lru_cache
+import re
+
+
+FONT_NAME = "Trebuchet MS"
+
+# Words shown in a smaller size on the title slide
+STOP_WORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "by",
+        "for",
+        "from",
+        "has",
+        "he",
+        "in",
+        "is",
+        "it",
+        "its",
+        "of",
+        "on",
+        "that",
+        "the",
+        "to",
+        "was",
+        "were",
+        "will",
+        "with",
+    }
+)
+
+# Text that can't be stored as-is in an <a:t> element and needs python-pptx's escaping
+_SPECIAL_CHARS = re.compile(r"[\x00-\x08\x0b-\x1f]")
+
+
+class ContentSlideTemplate:
+    """
+    The styled paragraph and page number text box of a content slide, built once with
+    python-pptx and then cloned for every page. Cloning the XML is much faster than
+    setting the font, size, spacing and alignment of every paragraph through
+    python-pptx, and produces exactly the same slides.
+    """
+
+    def __init__(self):
+        from pptx import Presentation
+        from pptx.enum.text import PP_ALIGN
+        from pptx.util import Inches
+
+        # Build one slide the slow way and keep its XML as the template
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        self._shapes = [deepcopy(shape.element) for shape in slide.shapes]
+
+        p = slide.shapes.title.text_frame.paragraphs[0]
+        p.line_spacing = 1.5
+        p.text = "text"
+        p.font.name = FONT_NAME
+        p.font.size = Inches(0.25)
+        p.alignment = PP_ALIGN.CENTER
+        self._paragraph = deepcopy(p._p)
+
+        page_num_box = slide.shapes.add_textbox(
+            Inches(0), Inches(6.5), Inches(10), Inches(0.5)
+        )
+        page_num_frame = page_num_box.text_frame
+        page_num_frame.text = "1"
+        page_num_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
+        page_num_frame.paragraphs[0].font.name = FONT_NAME
+        page_num_frame.paragraphs[0].font.size = Inches(0.15)
+        self._page_number = deepcopy(page_num_box.element)
+
+    def add_slide(self, prs, slide_layout):
+        """
+        Add a content slide to `prs` with its placeholders cloned from the template.
+
+        `slide_layout` must be the "Title Only" layout of the default template, which
+        is what Book.export uses.
+        """
+        try:
+            from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+            from pptx.parts.slide import SlidePart
+
+            part = prs.part
+            slide_part = SlidePart.new(
+                part._next_slide_partname, part.package, slide_layout.part
+            )
+            # A new slide can't be related to the presentation yet, so skip the lookup
+            # `relate_to` does for an existing relationship, which is linear in the
+            # number of slides
+            rId = part.rels._add_relationship(RT.SLIDE, slide_part)
+        except AttributeError:
+            # python-pptx internals changed, use the regular (slower) path
+            return prs.slides.add_slide(slide_layout)
+
+        slide = slide_part.slide
+        spTree = slide.shapes._spTree
+        for shape in self._shapes:
+            spTree.append(deepcopy(shape))
+        prs.slides._sldIdLst.add_sldId(rId)
+        return slide
+
+    @staticmethod
+    def _set_text(element, text: str) -> None:
+        from pptx.oxml.ns import qn
+
+        run = element.find(".//" + qn("a:r"))
+        if text:
+            run.find(qn("a:t")).text = text
+        else:
+            run.getparent().remove(run)
+
+    def fill_paragraphs(self, text_frame, sentences: list[str]) -> None:
+        """Replace the paragraphs in `text_frame` with one styled paragraph per sentence."""
+        from pptx.oxml.ns import qn
+
+        txBody = text_frame._txBody
+        for p in txBody.findall(qn("a:p")):
+            txBody.remove(p)
+        for sentence in sentences:
+            p = deepcopy(self._paragraph)
+            txBody.append(p)
+            if _SPECIAL_CHARS.search(sentence):
+                text_frame.paragraphs[-1].text = sentence
+            else:
+                self._set_text(p, sentence)
+
+    def add_page_number(self, slide, page_number: int) -> None:
+        """Add the page number text box to the bottom of `slide`."""
+        from pptx.oxml.ns import qn
+
+        spTree = slide.shapes._spTree
+        shape_id = 1 + max(
+            int(cNvPr.get("id")) for cNvPr in spTree.iter(qn("p:cNvPr"))
+        )
+        sp = deepcopy(self._page_number)
+        cNvPr = sp.find(".//" + qn("p:cNvPr"))
+        cNvPr.set("id", str(shape_id))
+        cNvPr.set("name", f"TextBox {shape_id - 1}")
+        self._set_text(sp, str(page_number))
+        spTree.append(sp)
+
+
+@lru_cache(maxsize=1)
+def get_content_slide_template() -> ContentSlideTemplate:
+    """Return the content slide template, building it the first time it is needed."""
+    return ContentSlideTemplate()
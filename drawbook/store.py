@@ -0,0 +1,191 @@
+"""
+Bounded-memory storage for rendered page previews.
+"""
+
+from collections import OrderedDict
+from collections.abc import MutableSequence
+from pathlib import Path
+from itertools import count
+import shutil
+import tempfile
+import threading
+import weakref
+
+
+class PreviewStore(MutableSequence):
+    """
+    A list of page previews that keeps only the most recently used pages decoded in
+    memory. Other pages are spilled to PNG files in a temporary directory and decoded
+    again when they are accessed.
+
+    Items are PIL images or None, and the store can be used anywhere a list of
+    previews was used before.
+    """
+
+    def __init__(self, max_in_memory: int = 16, directory: str | Path | None = None):
+        """
+        Args:
+            max_in_memory: Maximum number of decoded pages kept in memory.
+            directory: Directory to spill pages to. Defaults to a temporary directory
+                       that is removed when the store is garbage collected.
+        """
+        self.max_in_memory = max_in_memory
+        self._directory = Path(directory) if directory else None
+        self._items = []
+        self._memory = OrderedDict()
+        self._files = {}
+        self._thumbnails = {}
+        self._tokens = count()
+        self._lock = threading.RLock()
+
+    @property
+    def directory(self) -> Path:
+        """The directory pages are spilled to, created on first use."""
+        if self._directory is None:
+            self._directory = Path(tempfile.mkdtemp(prefix="drawbook-previews-"))
+            weakref.finalize(self, shutil.rmtree, self._directory, True)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        return self._directory
+
+    def _spill(self, token: int) -> Path:
+        path = self._files.get(token)
+        if path is None:
+            path = self.directory / f"{token}.png"
+            self._memory[token].save(path, format="PNG", compress_level=1)
+            self._files[token] = path
+        return path
+
+    def _remember(self, token: int, page) -> None:
+        self._memory[token] = page
+        self._memory.move_to_end(token)
+        while len(self._memory) > self.max_in_memory:
+            evicted = next(iter(self._memory))
+            self._spill(evicted)
+            del self._memory[evicted]
+
+    def _forget(self, token: int | None) -> None:
+        if token is None:
+            return
+        self._memory.pop(token, None)
+        path = self._files.pop(token, None)
+        if path is not None:
+            path.unlink(missing_ok=True)
+        for key in [key for key in self._thumbnails if key[0] == token]:
+            self._thumbnails.pop(key).unlink(missing_ok=True)
+
+    def _load(self, token: int | None):
+        if token is None:
+            return None
+        page = self._memory.get(token)
+        if page is not None:
+            self._memory.move_to_end(token)
+            return page
+
+        from PIL import Image
+
+        with Image.open(self._files[token]) as spilled:
+            page = spilled.copy()
+        self._remember(token, page)
+        return page
+
+    def _token_for(self, page) -> int | None:
+        if page is None:
+            return None
+        token = next(self._tokens)
+        self._remember(token, page)
+        return token
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        with self._lock:
+            if isinstance(index, slice):
+                return [self._load(token) for token in self._items[index]]
+            return self._load(self._items[index])
+
+    def __setitem__(self, index, page) -> None:
+        with self._lock:
+            if isinstance(index, slice):
+                for token in self._items[index]:
+                    self._forget(token)
+                self._items[index] = [self._token_for(p) for p in page]
+                return
+            self._forget(self._items[index])
+            self._items[index] = self._token_for(page)
+
+    def __delitem__(self, index) -> None:
+        with self._lock:
+            tokens = self._items[index] if isinstance(index, slice) else [self._items[index]]
+            for token in tokens:
+                self._forget(token)
+            del self._items[index]
+
+    def insert(self, index: int, page) -> None:
+        with self._lock:
+            self._items.insert(index, self._token_for(page))
+
+    def has_page(self, index: int) -> bool:
+        """Return whether there is a preview at `index`, without decoding it."""
+        with self._lock:
+            return 0 <= index < len(self._items) and self._items[index] is not None
+
+    def path(self, index: int) -> Path | None:
+        """
+        Return the path of a PNG file holding the page at `index`, spilling it to disk
+        if needed, or None if there is no preview for that page.
+        """
+        with self._lock:
+            token = self._items[index]
+            return None if token is None else self._spill(token)
+
+    def paths(self) -> list[Path | None]:
+        """Return the file path of every page, see `path`."""
+        return [self.path(i) for i in range(len(self))]
+
+    def in_memory(self) -> int:
+        """Return the number of pages currently decoded in memory."""
+        return len(self._memory)
+
+    def thumbnail(
+        self,
+        index: int,
+        size: tuple[int, int] = (480, 270),
+        image_format: str = "webp",
+        quality: int = 80,
+    ) -> Path | None:
+        """
+        Return the path of a downscaled, lossy-encoded thumbnail of the page at `index`,
+        or None if there is no preview for that page. Thumbnails are encoded once per
+        page version and reused until the page is replaced.
+
+        Args:
+            index: The page index.
+            size: Maximum (width, height) of the thumbnail.
+            image_format: "webp" or "jpeg". Falls back to JPEG if Pillow lacks WebP support.
+            quality: Encoder quality from 1 to 100.
+        """
+        from PIL import features
+
+        image_format = image_format.lower()
+        if image_format == "webp" and not features.check("webp"):
+            image_format = "jpeg"
+
+        with self._lock:
+            token = self._items[index]
+            if token is None:
+                return None
+            key = (token, tuple(size), image_format, quality)
+            path = self._thumbnails.get(key)
+            if path is None:
+                extension = "jpg" if image_format == "jpeg" else image_format
+                path = self.directory / f"{token}-{size[0]}x{size[1]}-q{quality}.{extension}"
+                thumbnail = self._load(token).copy()
+                thumbnail.thumbnail(size)
+                thumbnail.save(path, format=image_format.upper(), quality=quality)
+                self._thumbnails[key] = path
+            return path
+
+    def thumbnails(self, **kwargs) -> list[Path | None]:
+        """Return the thumbnail of every page, see `thumbnail`."""
+        return [self.thumbnail(i, **kwargs) for i in range(len(self))]
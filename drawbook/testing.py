@@ -0,0 +1,188 @@
+"""
+A local stand-in for the inference endpoints, for tests and offline benchmarks.
+
+    with FakeInferenceServer(image_latency=0.5) as server:
+        book = Book(..., prompt_backend=server.prompt_backend(),
+                    image_backend=server.image_backend())
+        book.illustrate(max_workers=8)
+
+The server answers chat completions (streamed or not) with prompts derived from
+the page text, and image requests with a PNG whose colour is derived from the
+prompt, so the same request always gets the same response.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+
+from .backends import InferenceAPIImageBackend, InferenceAPIPromptBackend
+
+
+class FakeInferenceServer:
+    """
+    An HTTP server implementing the chat completion and text-to-image requests that
+    drawbook sends, with configurable latency. It runs in a background thread.
+    """
+
+    def __init__(
+        self,
+        chat_latency: float = 0.0,
+        image_latency: float = 0.0,
+        image_size: tuple[int, int] = (64, 64),
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            chat_latency: Seconds every chat completion request takes.
+            image_latency: Seconds every image request takes.
+            image_size: (width, height) of the generated images.
+            host: Interface to listen on.
+            port: Port to listen on. 0 picks a free port.
+        """
+        self.chat_latency = chat_latency
+        self.image_latency = image_latency
+        self.image_size = image_size
+        self.chat_requests = 0
+        self.image_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def prompt_backend(self, **kwargs) -> InferenceAPIPromptBackend:
+        """Return a prompt backend that sends requests to this server."""
+        return InferenceAPIPromptBackend(base_url=self.url, token="fake", **kwargs)
+
+    def image_backend(self) -> InferenceAPIImageBackend:
+        """Return an image backend that sends requests to this server."""
+        return InferenceAPIImageBackend(base_url=f"{self.url}/models", token="fake")
+
+    def start(self) -> "FakeInferenceServer":
+        """Start serving requests in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and release its port."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeInferenceServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @staticmethod
+    def reply_for(user_prompt: str) -> str:
+        """Return the reply of the fake chat model to a message sent by `Book`."""
+        pages = re.findall(r"^Page \d+: (.*)$", user_prompt, re.MULTILINE)
+        if pages:
+            return json.dumps([f"An illustration of {text}" for text in pages])
+        match = re.search(r"^Text: (.*)$", user_prompt, re.MULTILINE)
+        return f"An illustration of {match.group(1) if match else user_prompt}"
+
+    def image_for(self, prompt: str) -> bytes:
+        """Return the PNG the fake image model generates for `prompt`."""
+        from PIL import Image
+
+        color = tuple(hashlib.sha256(prompt.encode("utf-8")).digest()[:3])
+        buffer = io.BytesIO()
+        Image.new("RGB", self.image_size, color).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+def _make_handler(server: FakeInferenceServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, body: bytes, content_type: str, status: int = 200) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(b'{"error": "Invalid JSON"}', "application/json", 400)
+                return
+
+            if self.path.rstrip("/").endswith("/chat/completions"):
+                server._count("chat_requests")
+                time.sleep(server.chat_latency)
+                messages = request.get("messages") or [{"content": ""}]
+                reply = server.reply_for(messages[-1]["content"])
+                self._send_chat(request, reply)
+            elif self.path.startswith("/models/"):
+                server._count("image_requests")
+                time.sleep(server.image_latency)
+                self._send(server.image_for(str(request.get("inputs", ""))), "image/png")
+            else:
+                self._send(b'{"error": "Not found"}', "application/json", 404)
+
+        def _send_chat(self, request: dict, reply: str) -> None:
+            model = request.get("model", "fake")
+            if not request.get("stream"):
+                body = {
+                    "id": "fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": reply},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+                self._send(json.dumps(body).encode("utf-8"), "application/json")
+                return
+
+            events = []
+            for content, finish_reason in [(reply, None), ("", "stop")]:
+                chunk = {
+                    "id": "fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"role": "assistant", "content": content},
+                            "finish_reason": finish_reason,
+                        }
+                    ],
+                }
+                events.append(f"data: {json.dumps(chunk)}\n\n")
+            events.append("data: [DONE]\n\n")
+            self._send("".join(events).encode("utf-8"), "text/event-stream")
+
+    return Handler
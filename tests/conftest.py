@@ -0,0 +1,83 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep drawbook's persistent caches out of the user's home directory during tests."""
+    from drawbook import backends, cache, metrics, ratelimit, singleflight
+
+    monkeypatch.setenv("DRAWBOOK_CACHE_DIR", str(tmp_path / "drawbook-cache"))
+    monkeypatch.setattr(cache, "_prompt_cache", None)
+    monkeypatch.setattr(ratelimit, "_limiters", {})
+    monkeypatch.setattr(metrics, "_listeners", [])
+    monkeypatch.setattr(backends, "_default_prompt_backend", None)
+    monkeypatch.setattr(backends, "_default_image_backend", None)
+    for flight in singleflight._flights.values():
+        monkeypatch.setattr(flight, "lock_dir", None)
+
+
+class FakeSession:
+    """Stands in for the shared requests session, sending every POST to `post`."""
+
+    def __init__(self, post):
+        self._post = post
+
+    def post(self, url, headers=None, json=None, stream=False, timeout=None):
+        return self._post(url, headers, json)
+
+
+class FakeResponse:
+    """A streamed `requests.Response` of the image API."""
+
+    def __init__(self, status_code=200, content=b"", text="", content_type="image/png"):
+        self.status_code = status_code
+        self.content = content
+        self.text = text
+        self.headers = {"Content-Type": content_type}
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+@pytest.fixture
+def png_bytes():
+    """A small white PNG."""
+    import io
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def fake_response():
+    """The `FakeResponse` class, for building responses of the fake image API."""
+    return FakeResponse
+
+
+@pytest.fixture
+def png_response(png_bytes):
+    """A function returning a successful image API response carrying `png_bytes`."""
+    return lambda: FakeResponse(content=png_bytes)
+
+
+@pytest.fixture
+def fake_image_api(monkeypatch):
+    """
+    A function that logs in with a fake token and sends every image request to
+    `post(url, headers, json)`, which returns a `FakeResponse`.
+    """
+
+    def install(post):
+        monkeypatch.setattr("huggingface_hub.get_token", lambda: "token")
+        monkeypatch.setattr("drawbook.session.get_session", lambda: FakeSession(post))
+
+    return install
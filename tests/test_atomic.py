@@ -0,0 +1,25 @@
+import pytest
+
+from drawbook.atomic import atomic_write, write_atomic
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = tmp_path / "book.json"
+    path.write_text("old")
+    with atomic_write(path, "w", encoding="utf-8") as f:
+        f.write("new")
+    assert path.read_text() == "new"
+
+    write_atomic(path, [b"a", b"b"])
+    assert path.read_bytes() == b"ab"
+
+
+def test_atomic_write_keeps_the_old_file_on_errors(tmp_path):
+    path = tmp_path / "book.json"
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            f.write("partial")
+            raise RuntimeError("interrupted")
+    assert path.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,100 @@
+import asyncio
+
+from PIL import Image
+
+from drawbook.backends import (
+    IMAGE_API_URL,
+    InferenceAPIImageBackend,
+    get_image_backend,
+    set_default_backends,
+)
+from drawbook.core import Book
+from drawbook.testing import FakeInferenceServer
+
+
+def test_illustrate_against_fake_server(tmp_path):
+    with FakeInferenceServer() as server:
+        book = Book(
+            title="Test Book",
+            pages=["A cat sat.", "A dog ran."],
+            prompt_backend=server.prompt_backend(),
+            image_backend=server.image_backend(),
+        )
+        book.illustrate(save_dir=tmp_path, max_workers=2, image_cache=False)
+
+        assert book.illustration_prompts == [
+            "An illustration of A cat sat.",
+            "An illustration of A dog ran.",
+        ]
+        assert book.title_illustration_prompt == "An illustration of Test Book"
+        # The prompts of all three pages are extracted in one batched request
+        assert server.chat_requests == 1
+        assert server.image_requests == 3
+        with Image.open(book.illustrations[0]) as image:
+            assert image.size == (64, 64)
+
+
+def test_fake_server_is_deterministic(tmp_path):
+    with FakeInferenceServer(image_size=(16, 8)) as server:
+        assert server.image_for("A red kite") == server.image_for("A red kite")
+        assert server.image_for("A red kite") != server.image_for("A blue kite")
+
+        set_default_backends(server.prompt_backend(), server.image_backend())
+        book = Book(title="Test Book", pages=["A cow."], title_illustration=False)
+        asyncio.run(book.aillustrate(save_dir=tmp_path, image_cache=False))
+        prompt = book._get_prompt("An illustration of A cow.")
+        with open(book.illustrations[0], "rb") as f:
+            assert f.read() == server.image_for(prompt)
+
+
+def test_image_backend_credentials(monkeypatch):
+    monkeypatch.setattr("huggingface_hub.get_token", lambda: None)
+    assert get_image_backend().url("user/lora") == f"{IMAGE_API_URL}/user/lora"
+    assert "No Hugging Face token" in get_image_backend().missing_credentials()
+
+    backend = InferenceAPIImageBackend(base_url="http://images.internal/models/")
+    assert backend.url("user/lora") == "http://images.internal/models/user/lora"
+    assert backend.missing_credentials() is None
+    assert backend.headers() == {}
+
+
+def test_backends_must_implement_their_requests():
+    import pytest
+    from drawbook.backends import ImageBackend, PromptBackend
+
+    with pytest.raises(TypeError):
+        PromptBackend()
+    with pytest.raises(TypeError):
+        ImageBackend()
+
+
+def test_prompt_backend_works_across_event_loops(caplog):
+    with FakeInferenceServer() as server:
+        backend = server.prompt_backend()
+        messages = [{"role": "user", "content": "Text: A cat sat."}]
+        # Every asyncio.run call has its own event loop, which clients must not outlive
+        for _ in range(3):
+            assert asyncio.run(backend.achat(messages)) == "An illustration of A cat sat."
+    assert not [record for record in caplog.records if record.name == "asyncio"]
+
+
+def test_caches_are_not_shared_between_backends(tmp_path):
+    pages = ["A dog runs."]
+    with FakeInferenceServer() as first, FakeInferenceServer(image_size=(16, 16)) as second:
+        for i, server in enumerate((first, second)):
+            book = Book(
+                title="Test Book",
+                pages=pages,
+                prompt_backend=server.prompt_backend(),
+                image_backend=server.image_backend(),
+            )
+            book.illustrate(save_dir=tmp_path / str(i))
+            # Both prompts and images come from the backend, not from the first one's cache
+            assert server.chat_requests == 1
+            assert server.image_requests == 2
+            with Image.open(book.illustrations[0]) as image:
+                assert image.size == server.image_size
+
+        # Fake servers report the default model name, but still get their own prompts
+        default_book = Book(title="Test Book", pages=pages)
+        assert default_book._cached_illustration_prompt(pages[0]) is None
@@ -0,0 +1,160 @@
+import json
+import threading
+
+import pytest
+
+from drawbook.batch import find_books, run_batch
+from drawbook.cli import main
+from drawbook.core import Book
+
+
+def _write_books(directory, count):
+    directory.mkdir()
+    for i in range(count):
+        Book(title=f"Book {i}", pages=["Page 1", "Page 2"]).save(directory / f"book{i}.json")
+
+
+@pytest.fixture
+def fake_api(monkeypatch, fake_image_api, png_response):
+    """A function installing a fake image API that records its peak concurrency."""
+
+    def install(fail_title=None):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def fake_post(url, headers, json):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            try:
+                if fail_title and fail_title in json["inputs"]:
+                    raise RuntimeError("boom")
+                return png_response()
+            finally:
+                with lock:
+                    state["active"] -= 1
+
+        fake_image_api(fake_post)
+        monkeypatch.setattr(Book, "_get_illustration_prompt", lambda self, text, page=None: text)
+        return state
+
+    return install
+
+
+def test_find_books(tmp_path):
+    _write_books(tmp_path / "books", 2)
+    books = find_books(tmp_path / "books")
+    assert [path.name for path in books] == ["book0.json", "book1.json"]
+
+    listing = tmp_path / "books.txt"
+    listing.write_text("# nightly run\nbooks/book1.json\n\n")
+    assert find_books(listing) == [(tmp_path / "books" / "book1.json").resolve()]
+
+
+def test_run_batch(tmp_path, fake_api):
+    _write_books(tmp_path / "books", 3)
+    state = fake_api()
+
+    manifest = run_batch(
+        tmp_path / "books",
+        tmp_path / "out",
+        max_workers=2,
+        max_books=3,
+        formats=["pptx", "pdf"],
+        batch_prompts=False,
+        image_cache=False,
+    )
+    assert manifest.summary() == {"done": 3}
+    assert state["peak"] <= 2
+    for i in range(3):
+        book_dir = tmp_path / "out" / f"book{i}"
+        assert (book_dir / f"book{i}.pptx").exists()
+        assert (book_dir / f"book{i}.pdf").exists()
+        assert len(list((book_dir / "images").glob("*.png"))) == 3
+    saved = json.loads((tmp_path / "out" / "manifest.json").read_text())
+    assert all(entry["missing_illustrations"] == 0 for entry in saved["books"].values())
+
+
+def test_run_batch_keeps_books_with_the_same_name_apart(tmp_path, fake_api):
+    fake_api()
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        Book(title=f"Book {folder}", pages=["Page 1"]).save(tmp_path / folder / "book.json")
+    listing = tmp_path / "books.txt"
+    listing.write_text("a/book.json\nb/book.json\n")
+
+    manifest = run_batch(listing, tmp_path / "out", batch_prompts=False, image_cache=False)
+    assert manifest.summary() == {"done": 2}
+    folders = sorted(path for path in (tmp_path / "out").iterdir() if path.is_dir())
+    assert len(folders) == 2
+    titles = {Book.load(folder / "book.json").title for folder in folders}
+    assert titles == {"Book a", "Book b"}
+
+    # Found through a directory, the book has the same entry and keeps its folder
+    key = str((tmp_path / "a" / "book.json").resolve())
+    first = dict(manifest.books[key])
+    manifest = run_batch(tmp_path / "a", tmp_path / "out")
+    assert len(manifest.books) == 2
+    assert manifest.books[key] == first
+
+
+def test_run_batch_retries_incomplete_books(tmp_path, monkeypatch, fake_api):
+    _write_books(tmp_path / "books", 1)
+    fake_api(fail_title="Page 2")
+
+    manifest = run_batch(
+        tmp_path / "books", tmp_path / "out", batch_prompts=False, image_cache=False
+    )
+    assert manifest.summary() == {"incomplete": 1}
+    entry = manifest.books[str(tmp_path / "books" / "book0.json")]
+    assert entry["missing_illustrations"] == 1
+
+    monkeypatch.undo()
+    fake_api()
+    manifest = run_batch(
+        tmp_path / "books", tmp_path / "out", batch_prompts=False, image_cache=False
+    )
+    assert manifest.summary() == {"done": 1}
+    assert Book.load(tmp_path / "out" / "book0" / "book.json").illustrations[1] is not None
+
+
+def test_run_batch_records_failures_and_skips_done_books(tmp_path, monkeypatch, fake_api):
+    _write_books(tmp_path / "books", 2)
+    fake_api()
+
+    def export(self, filename):
+        if self.title == "Book 1":
+            raise OSError("disk full")
+        return filename
+
+    monkeypatch.setattr(Book, "export", export)
+
+    manifest = run_batch(tmp_path / "books", tmp_path / "out", illustrate=False)
+    assert manifest.summary() == {"done": 1, "failed": 1}
+    failed = manifest.books[str(tmp_path / "books" / "book1.json")]
+    assert failed["error"] == "OSError: disk full"
+
+    monkeypatch.undo()
+    fake_api()
+    exported = []
+    monkeypatch.setattr(Book, "export", lambda self, filename: exported.append(self.title))
+    manifest = run_batch(tmp_path / "books", tmp_path / "out", illustrate=False)
+    assert manifest.summary() == {"done": 2}
+    assert exported == ["Book 1"]
+
+
+def test_cli_batch(tmp_path, fake_api):
+    _write_books(tmp_path / "books", 1)
+    fake_api()
+    code = main(
+        [
+            "batch",
+            str(tmp_path / "books"),
+            str(tmp_path / "out"),
+            "--format",
+            "drawbook",
+            "--no-illustrate",
+        ]
+    )
+    assert code == 0
+    assert (tmp_path / "out" / "book0" / "book0.drawbook").exists()
@@ -0,0 +1,46 @@
+import os
+import zipfile
+
+import pytest
+from PIL import Image
+
+from drawbook import Book
+
+
+def test_bundle_round_trip_is_lazy_and_deduplicated(tmp_path):
+    illustration = tmp_path / "page_1.png"
+    Image.new("RGB", (32, 32), "red").save(illustration)
+    book = Book(
+        title="Test Book",
+        pages=["Page 1", "Page 2", "Page 3"],
+        title_illustration=str(illustration),
+        illustrations=[str(illustration), str(illustration), False],
+        illustration_prompts=["A red square", None, None],
+    )
+
+    bundle_path = book.save_bundle(tmp_path / "book.drawbook")
+    illustration.unlink()  # The bundle must not depend on the original files
+
+    with zipfile.ZipFile(bundle_path) as bundle:
+        images = [name for name in bundle.namelist() if name.startswith("images/")]
+    assert len(images) == 1
+
+    loaded = Book.load_bundle(bundle_path)
+    assert loaded.illustration_prompts == ["A red square", None, None]
+    assert loaded.illustrations[0] == loaded.illustrations[1] == loaded.title_illustration
+    assert loaded.illustrations[2] is False
+    extracted = loaded.illustrations[0]
+    assert not os.path.exists(extracted)  # Nothing is read from the bundle until needed
+
+    preview = loaded.create_preview(page_num=1)
+    assert preview.getpixel((960, 540)) == (255, 0, 0)
+    assert Image.open(extracted).size == (32, 32)
+    loaded.export(tmp_path / "book.pptx")
+
+
+def test_load_warns_about_missing_illustrations(tmp_path):
+    book = Book(title="Test Book", pages=["Page 1"], illustrations=[str(tmp_path / "gone.png")])
+    book.save(tmp_path / "book.json")
+
+    with pytest.warns(UserWarning, match="1 illustration"):
+        Book.load(tmp_path / "book.json")
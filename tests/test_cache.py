@@ -0,0 +1,52 @@
+import os
+
+from drawbook.cache import ImageCache
+
+
+def test_image_cache_round_trip(tmp_path):
+    cache = ImageCache(tmp_path / "cache")
+    source = tmp_path / "image.png"
+    source.write_bytes(b"image bytes")
+
+    key = ImageCache.make_key("lora", "A red balloon", {"format": "png"})
+    assert key != ImageCache.make_key("lora", "A blue balloon", {"format": "png"})
+    assert cache.get(key) is None
+
+    cache.put(key, source)
+    assert cache.copy_to(key, tmp_path / "copy.png")
+    assert (tmp_path / "copy.png").read_bytes() == b"image bytes"
+    assert not list((tmp_path / "cache").glob("*.tmp"))
+
+
+def test_image_cache_evicts_least_recently_used(tmp_path):
+    cache = ImageCache(tmp_path / "cache", max_bytes=25)
+    source = tmp_path / "image.png"
+    source.write_bytes(b"0123456789")
+
+    for i, key in enumerate(["a", "b"]):
+        path = cache.put(key, source)
+        os.utime(path, (i, i))
+    cache.get("a")  # "a" is now the most recently used entry
+    cache.put("c", source)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_prompt_cache_shared_across_instances(tmp_path):
+    from drawbook.cache import PromptCache
+
+    key = PromptCache.make_key("model", "v1", "Once upon a time")
+    assert key != PromptCache.make_key("model", "v2", "Once upon a time")
+
+    first = PromptCache(tmp_path / "prompts.sqlite")
+    assert first.get(key) is None
+    first.put(key, "A castle on a hill")
+    assert first.get(key) == "A castle on a hill"
+    assert first.stats() == {"hits": 1, "misses": 1}
+
+    # A fresh instance (e.g. another process) reads the entry back from sqlite
+    second = PromptCache(tmp_path / "prompts.sqlite", max_memory_entries=1)
+    assert second.get(key) == "A castle on a hill"
+    assert second.stats() == {"hits": 1, "misses": 0}
@@ -25,4 +25,487 @@ def test_export():
     )
     book.export()
     # Note: We can't easily test the exact file location since it's temporary,
-    # but we can verify the method runs without errors 
\ No newline at end of file
+    # but we can verify the method runs without errors 
+
+def test_illustrate_concurrent(tmp_path, monkeypatch, fake_image_api, png_response):
+    import threading
+    import time
+
+    book = Book(title="Test Book", pages=["Page 1", "Page 2", "Page 3"])
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_post(url, headers, json):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return png_response()
+
+    fake_image_api(fake_post)
+    monkeypatch.setattr(book, "_get_illustration_prompt", lambda text, page=None: f"prompt for {text}")
+
+    book.illustrate(save_dir=tmp_path, max_workers=2, batch_prompts=False)
+
+    assert peak[0] == 2
+    assert book.title_illustration == str(tmp_path / "title.png")
+    assert book.illustrations == [str(tmp_path / f"page_{i}.png") for i in (1, 2, 3)]
+    assert book.illustration_prompts == ["prompt for Page 1", "prompt for Page 2", "prompt for Page 3"]
+
+
+def test_illustrate_reports_failed_pages(
+    tmp_path, monkeypatch, fake_image_api, png_response, fake_response
+):
+    book = Book(title="Test Book", pages=["Page 1", "Page 2"], title_illustration=False)
+
+    def fake_post(url, headers, json):
+        if json["inputs"].endswith("Page 2"):
+            return fake_response(status_code=400, text="server error")
+        return png_response()
+
+    fake_image_api(fake_post)
+    monkeypatch.setattr(book, "_get_illustration_prompt", lambda text, page=None: text)
+
+    book.illustrate(save_dir=tmp_path, max_workers=4, batch_prompts=False)
+    assert book.illustrations == [str(tmp_path / "page_1.png"), None]
+
+    status = book.illustrate(save_dir=tmp_path, page_num=2)
+    assert status == "Error: Failed to generate illustration for page_2: server error"
+
+
+def test_generate_prompts_batched(monkeypatch):
+    book = Book(title="Test Book", pages=["Page 1", "Page 2", "Page 3"], illustrations=[None, "page_2.png", None])
+    requests_sent = []
+
+    def fake_chat(user_prompt, max_tokens=500, **attributes):
+        requests_sent.append(user_prompt)
+        return 'Here you go: ["A title", "A first page"]'
+
+    monkeypatch.setattr(book, "_chat", fake_chat)
+    monkeypatch.setattr(book, "_get_illustration_prompt", lambda text, page=None: f"single {text}")
+
+    book.generate_prompts(batch_size=2)
+
+    # The title and page 1 fit in one batch, page 3 is left over and sent alone
+    assert len(requests_sent) == 1
+    assert book.title_illustration_prompt == "A title"
+    assert book.illustration_prompts == ["A first page", None, "single Page 3"]
+
+
+def test_generate_prompts_falls_back_on_bad_reply(monkeypatch):
+    book = Book(title="Test Book", pages=["Page 1"])
+    monkeypatch.setattr(book, "_chat", lambda user_prompt, max_tokens=500, **attributes: "not json")
+    monkeypatch.setattr(book, "_get_illustration_prompt", lambda text, page=None: f"single {text}")
+
+    book.generate_prompts()
+
+    assert book.title_illustration_prompt == "single Test Book"
+    assert book.illustration_prompts == ["single Page 1"]
+
+
+def test_illustrate_uses_image_cache(tmp_path, monkeypatch, fake_image_api, png_response):
+    from drawbook.cache import ImageCache
+
+    calls = []
+
+    def fake_post(url, headers, json):
+        calls.append(json["inputs"])
+        return png_response()
+
+    fake_image_api(fake_post)
+    cache = ImageCache(tmp_path / "cache")
+
+    for save_dir in ("first", "second"):
+        book = Book(title="Test Book", pages=["Page 1"], title_illustration=False)
+        monkeypatch.setattr(book, "_get_illustration_prompt", lambda text, page=None: text)
+        book.illustrate(save_dir=tmp_path / save_dir, batch_prompts=False, image_cache=cache)
+        assert book.illustrations == [str(tmp_path / save_dir / "page_1.png")]
+
+    assert len(calls) == 1
+
+
+def test_illustration_prompts_are_memoized(monkeypatch):
+    calls = []
+
+    def fake_chat(user_prompt, max_tokens=500, **attributes):
+        calls.append(user_prompt)
+        return "A rocket"
+
+    first = Book(title="Test Book", pages=["Blast off!"])
+    monkeypatch.setattr(first, "_chat", fake_chat)
+    assert first._get_illustration_prompt("Blast off!") == "A rocket"
+
+    second = Book(title="Another Book", pages=["Blast off!"], title_illustration=False)
+    monkeypatch.setattr(second, "_chat", fake_chat)
+    second.generate_prompts()
+
+    assert second.illustration_prompts == ["A rocket"]
+    assert len(calls) == 1
+    assert second.prompt_cache.stats()["hits"] == 1
+
+
+def test_create_preview(tmp_path):
+    from PIL import Image
+
+    illustration = tmp_path / "page_1.png"
+    Image.new("RGB", (64, 64), "red").save(illustration)
+    book = Book(
+        title="Test Book",
+        pages=["Page 1", "Page 2"],
+        illustrations=[str(illustration), False],
+        author="Test Author",
+    )
+
+    preview = book.create_preview(page_num=1)
+
+    assert preview.size == (1920, 1080)
+    assert preview.getpixel((960, 540)) == (255, 0, 0)
+    assert book.create_preview(page_num=0).size == (1920, 1080)
+
+
+def test_create_preview_only_renders_dirty_pages(tmp_path, monkeypatch):
+    from drawbook import render
+
+    book = Book(title="Test Book", pages=["Page 1", "Page 2", "Page 3"])
+    rendered = []
+    render_content_page = render.render_content_page
+
+    def counting_render(page_number, text, illustration=None, **kwargs):
+        rendered.append(page_number)
+        return render_content_page(page_number, text, illustration, **kwargs)
+
+    monkeypatch.setattr(render, "render_content_page", counting_render)
+
+    previews = book.create_preview()
+    assert len(previews) == 4
+    assert rendered == [1, 2, 3]
+    assert book.dirty_pages() == []
+
+    first_preview = previews[1]
+    book.pages[1] = "A new page 2"
+    book.illustration_prompts[2] = "A new prompt"
+    book.create_preview()
+    assert rendered == [1, 2, 3, 2, 3]
+    assert book.page_previews[1] is first_preview
+
+    book.mark_dirty(1)
+    assert book.create_preview(page_num=1) is book.page_previews[1]
+    assert rendered[-1] == 1
+
+    book.pages.pop()
+    assert len(book.create_preview()) == 3
+
+
+def test_export_with_optimized_images(tmp_path):
+    from PIL import Image
+
+    illustration = tmp_path / "page_1.png"
+    Image.effect_noise((1024, 1024), 64).convert("RGB").save(illustration)
+    book = Book(title="Test Book", pages=["Page 1"], illustrations=[str(illustration)])
+
+    original = book.export(tmp_path / "original.pptx")
+    optimized = book.export(tmp_path / "optimized.pptx", optimize_images=True, image_dpi=72)
+
+    assert optimized.stat().st_size < original.stat().st_size / 2
+
+
+def test_export_to_buffer(tmp_path, monkeypatch):
+    import io
+    import tempfile
+    from pptx import Presentation
+
+    book = Book(title="Test Book", pages=["Page 1", "Page 2"], illustrations=[None, False])
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    buffer = io.BytesIO()
+    assert book.export(buffer) is buffer
+    data = book.export_bytes()
+
+    for deck in (buffer.getvalue(), data):
+        assert len(Presentation(io.BytesIO(deck)).slides) == 3
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_slide_contents(tmp_path):
+    from pptx import Presentation
+
+    book = Book(
+        title="Test Book",
+        pages=["First page. Second sentence.", "", "Third page. With two. Sentences"],
+        illustrations=[None, False, None],
+    )
+    prs = Presentation(book.export(tmp_path / "book.pptx"))
+    slides = list(prs.slides)[1:]
+
+    texts = [[shape.text_frame.text for shape in slide.shapes] for slide in slides]
+    assert texts == [
+        ["First page.\nSecond sentence.", "1"],
+        ["", "2"],
+        ["Third page.\nWith two.\nSentences", "3"],
+    ]
+    for slide in slides:
+        shape_ids = [shape.shape_id for shape in slide.shapes]
+        assert len(set(shape_ids)) == len(shape_ids)
+
+
+def test_export_pdf(tmp_path):
+    import pytest
+
+    book = Book(title="Test Book", pages=["Page 1", "Page 2"], author="Test Author")
+
+    path = book.export_pdf(tmp_path / "book.pdf", dpi=96)
+
+    data = path.read_bytes()
+    assert data.startswith(b"%PDF")
+    assert b"/Count 3" in data
+    assert b"/Width 960 /Height 540" in data
+    assert len(book.page_previews) == 0  # Rendering for the PDF doesn't keep pages around
+
+    # Pages are rendered at 192 dpi, so higher resolutions would only upscale them
+    with pytest.raises(ValueError, match="between 1 and 192 dpi"):
+        book.export_pdf(tmp_path / "large.pdf", dpi=300)
+    assert not (tmp_path / "large.pdf").exists()
+    with pytest.raises(ValueError, match="Unsupported PDF compression"):
+        book.export_pdf(tmp_path / "png.pdf", compression="png")
+    assert not (tmp_path / "png.pdf").exists()
+
+
+def test_export_pdf_leaves_no_partial_file(tmp_path, monkeypatch):
+    import pytest
+    from PIL import Image
+    from drawbook import core, render
+
+    illustration = tmp_path / "page_1.png"
+    Image.new("RGB", (64, 64), "red").save(illustration)
+    book = Book(
+        title="Test Book", pages=["Page 1", "Page 2"], illustrations=[str(illustration), None]
+    )
+    render.illustration_cache.clear()
+    book.export_pdf(tmp_path / "book.pdf")
+    # Illustrations drawn for a PDF aren't kept in the preview cache
+    assert not render.illustration_cache._entries
+
+    def fail_on_page_2(spec, cache_illustrations=True):
+        if spec[0] == "content" and spec[1] == 2:
+            raise RuntimeError("render failed")
+        return render.render_page(spec, cache_illustrations)
+
+    monkeypatch.setattr(core, "render_page", fail_on_page_2)
+    with pytest.raises(RuntimeError):
+        book.export_pdf(tmp_path / "failed.pdf")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["book.pdf", "page_1.png"]
+
+
+def test_illustrate_resumes_from_checkpoint(tmp_path, monkeypatch, fake_image_api, png_response):
+    import json
+    import pytest
+
+    class Crash(BaseException):
+        pass
+
+    requested = []
+
+    def fake_post(url, headers, json):
+        requested.append(json["inputs"])
+        if json["inputs"].endswith("Page 2") and len(requested) == 2:
+            raise Crash()
+        return png_response()
+
+    fake_image_api(fake_post)
+    checkpoint = tmp_path / "checkpoint.json"
+
+    def new_book():
+        book = Book(title="Test Book", pages=["Page 1", "Page 2"], title_illustration=False)
+        monkeypatch.setattr(book, "_get_illustration_prompt", lambda text, page=None: text)
+        return book
+
+    with pytest.raises(Crash):
+        new_book().illustrate(
+            save_dir=tmp_path, batch_prompts=False, image_cache=False, checkpoint=checkpoint
+        )
+    saved = json.loads(checkpoint.read_text())
+    assert saved["illustrations"] == [str(tmp_path / "page_1.png"), None]
+
+    book = new_book()
+    book.illustrate(save_dir=tmp_path, batch_prompts=False, image_cache=False, checkpoint=checkpoint)
+
+    assert requested[2:] == ["A AQUACOLTOK watercolor painting with a white background of: Page 2"]
+    assert book.illustrations == [str(tmp_path / "page_1.png"), str(tmp_path / "page_2.png")]
+    assert json.loads(checkpoint.read_text())["illustrations"] == book.illustrations
+
+
+def test_aillustrate_runs_pages_concurrently(tmp_path, monkeypatch, png_bytes):
+    import asyncio
+    import httpx
+
+    state = {"active": 0, "peak": 0}
+
+    async def handler(request):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return httpx.Response(200, content=png_bytes, headers={"Content-Type": "image/png"})
+
+    async def fake_prompt(text, page=None):
+        return text
+
+    monkeypatch.setattr("huggingface_hub.get_token", lambda: "token")
+    book = Book(title="Test Book", pages=[f"Page {i}" for i in range(6)])
+    monkeypatch.setattr(book, "aget_illustration_prompt", fake_prompt)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await book.aillustrate(
+                save_dir=tmp_path, max_concurrency=3, image_cache=False, http_client=client
+            )
+
+    asyncio.run(main())
+    assert state["peak"] == 3
+    assert book.title_illustration == str(tmp_path / "title.png")
+    assert book.illustrations == [str(tmp_path / f"page_{i + 1}.png") for i in range(6)]
+
+
+def test_aillustrate_cancellation_keeps_finished_pages(tmp_path, monkeypatch, png_bytes):
+    import asyncio
+    import httpx
+
+
+    async def handler(request):
+        if request.read().decode().endswith('Page 1"}'):
+            return httpx.Response(200, content=png_bytes)
+        await asyncio.sleep(60)
+
+    async def fake_prompt(text, page=None):
+        return text
+
+    monkeypatch.setattr("huggingface_hub.get_token", lambda: "token")
+    book = Book(title="Test Book", pages=["Page 1", "Page 2"], title_illustration=False)
+    monkeypatch.setattr(book, "aget_illustration_prompt", fake_prompt)
+    checkpoint = tmp_path / "book.json"
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            task = asyncio.create_task(
+                book.aillustrate(
+                    save_dir=tmp_path,
+                    image_cache=False,
+                    http_client=client,
+                    checkpoint=checkpoint,
+                )
+            )
+            while book.illustrations[0] is None:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            return task.cancelled()
+
+    assert asyncio.run(main())
+    assert book.illustrations == [str(tmp_path / "page_1.png"), None]
+    assert Book.load(checkpoint).illustrations == book.illustrations
+
+
+def test_aillustrate_keeps_file_io_off_the_event_loop(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+    from drawbook.cache import PromptCache
+    from drawbook.testing import FakeInferenceServer
+
+    loop_threads = []
+    calls = []
+
+    def record(name, fn):
+        def wrapper(*args, **kwargs):
+            calls.append((name, threading.current_thread()))
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(PromptCache, "get", record("get", PromptCache.get))
+    monkeypatch.setattr(PromptCache, "put", record("put", PromptCache.put))
+    monkeypatch.setattr(Book, "_write_json", record("write", Book._write_json))
+    monkeypatch.setattr(Book, "_resume_from", record("resume", Book._resume_from))
+
+    async def main():
+        loop_threads.append(threading.current_thread())
+        await book.aillustrate(
+            save_dir=tmp_path, image_cache=False, checkpoint=tmp_path / "book.json"
+        )
+
+    with FakeInferenceServer() as server:
+        book = Book(
+            title="Test Book",
+            pages=["Page 1", "Page 2"],
+            prompt_backend=server.prompt_backend(),
+            image_backend=server.image_backend(),
+            prompt_cache=PromptCache(tmp_path / "prompts.sqlite"),
+        )
+        asyncio.run(main())
+
+    assert {name for name, _ in calls} == {"get", "put", "write", "resume"}
+    assert all(thread is not loop_threads[0] for _, thread in calls)
+    assert Book.load(tmp_path / "book.json").illustrations == book.illustrations
+
+
+def test_aget_illustration_prompt(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    class FakeAsyncClient:
+        def __init__(self):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+            self.calls = 0
+
+        async def create(self, **kwargs):
+            self.calls += 1
+
+            async def stream():
+                for part in ["A red ", "kite"]:
+                    yield SimpleNamespace(
+                        choices=[SimpleNamespace(delta=SimpleNamespace(content=part))]
+                    )
+
+            return stream()
+
+    from drawbook.backends import InferenceAPIPromptBackend
+
+    client = FakeAsyncClient()
+    book = Book(
+        title="Test Book",
+        pages=["Sam flies a red kite."],
+        prompt_backend=InferenceAPIPromptBackend(async_client=client),
+    )
+    assert asyncio.run(book.aget_illustration_prompt("Sam flies a red kite.")) == "A red kite"
+    # The second call is answered from the prompt cache
+    assert asyncio.run(book.aget_illustration_prompt("Sam flies a red kite.")) == "A red kite"
+    assert client.calls == 1
+
+
+def test_prompt_fallback_warns_once(monkeypatch):
+    import sys
+    import types
+    import warnings
+
+    def fail(user_prompt, max_tokens=500, **attributes):
+        raise ConnectionError("offline")
+
+    book = Book(title="Test Book", pages=["Page 1"], prompt_cache=False)
+    monkeypatch.setattr(book, "_chat", fail)
+    monkeypatch.delitem(sys.modules, "gradio", raising=False)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert book._get_illustration_prompt("Page 1") == "Page 1"
+    assert len(caught) == 1
+
+    # With gradio imported, only gr.Warning is called
+    shown = []
+    monkeypatch.setitem(sys.modules, "gradio", types.SimpleNamespace(Warning=shown.append))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        book._get_illustration_prompt("Page 1")
+    assert len(shown) == 1 and not caught
@@ -0,0 +1,77 @@
+import pytest
+from PIL import Image
+
+from drawbook.images import save_response_image, sniff_format
+
+
+def test_sniff_format(png_bytes):
+    assert sniff_format(png_bytes[:16]) == "png"
+    assert sniff_format(b"\xff\xd8\xff\xe0" + b"\x00" * 12) == "jpeg"
+    assert sniff_format(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "webp"
+    assert sniff_format(b"<html>") is None
+
+
+def test_save_response_image_streams_matching_format(tmp_path, monkeypatch, png_response):
+    response = png_response()
+    monkeypatch.setattr(Image, "open", None)  # Decoding would fail loudly
+
+    received = save_response_image(response, tmp_path / "a.png", chunk_size=7)
+
+    assert received == len(response.content)
+    assert (tmp_path / "a.png").read_bytes() == response.content
+
+
+def test_save_response_image_transcodes(tmp_path, png_response):
+    save_response_image(png_response(), tmp_path / "a.jpg", image_format="jpg", size=(4, 4))
+    with Image.open(tmp_path / "a.jpg") as image:
+        assert image.format == "JPEG"
+        assert image.size == (4, 4)
+
+
+def test_save_response_image_rejects_non_images(tmp_path, fake_response):
+    response = fake_response(content=b"<html>oops</html>", content_type="text/html")
+    with pytest.raises(ValueError, match="text/html"):
+        save_response_image(response, tmp_path / "a.png")
+    assert not (tmp_path / "a.png").exists()
+
+
+def test_optimize_image_downscales_and_caches(tmp_path):
+    from drawbook.cache import ImageCache
+    from drawbook.images import optimize_image
+
+    source = tmp_path / "page_1.png"
+    Image.new("RGBA", (1024, 1024), (255, 0, 0, 128)).save(source)
+    cache = ImageCache(tmp_path / "optimized")
+
+    optimized = optimize_image(source, 750, cache=cache)
+    with Image.open(optimized) as image:
+        assert image.size == (750, 750)
+        assert image.format == "PNG"  # Alpha channels are kept
+    assert optimize_image(source, 750, cache=cache) == optimized
+
+
+def test_optimize_image_stores_opaque_images_as_jpeg(tmp_path):
+    from drawbook.images import optimize_image
+
+    source = tmp_path / "page_1.png"
+    Image.new("RGBA", (100, 100), (255, 0, 0, 255)).save(source)
+
+    with Image.open(optimize_image(source, 750)) as image:
+        assert image.format == "JPEG"
+        assert image.size == (100, 100)
+
+
+@pytest.mark.parametrize("image_format", ["webp", "gif"])
+def test_optimize_image_rejects_unsupported_formats(tmp_path, image_format):
+    from drawbook import Book
+    from drawbook.images import optimize_image
+
+    source = tmp_path / "page_1.png"
+    Image.new("RGB", (100, 100), "red").save(source)
+
+    with pytest.raises(ValueError, match="Unsupported optimized image format"):
+        optimize_image(source, 750, image_format)
+    book = Book(title="Test Book", pages=["Page 1"], illustrations=[str(source)])
+    with pytest.raises(ValueError, match="Unsupported optimized image format"):
+        book.export(tmp_path / "book.pptx", optimize_images=True, image_format=image_format)
+    assert not (tmp_path / "book.pptx").exists()
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+
+# Cold-start budget for `import drawbook`, in seconds. Importing gradio alone takes
+# several seconds, so going over this almost always means a heavy dependency is
+# being imported at module level again.
+IMPORT_TIME_BUDGET = 0.5
+
+HEAVY_MODULES = ["gradio", "huggingface_hub", "pptx", "requests", "tqdm", "PIL"]
+
+
+def test_import_is_lazy_and_fast():
+    code = f"""
+import sys, time
+start = time.perf_counter()
+import drawbook
+from drawbook import Book
+book = Book(title="Test Book", pages=["Page 1"])
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+
+    assert output[1] == "", f"heavy modules imported eagerly: {output[1]}"
+    assert float(output[0]) < IMPORT_TIME_BUDGET
@@ -0,0 +1,112 @@
+import sys
+from unittest import mock
+
+import pytest
+
+from drawbook import metrics, session
+from drawbook.core import Book
+from drawbook.metrics import Event, OpenTelemetryExporter, collect_metrics
+from drawbook.testing import FakeInferenceServer
+
+
+def test_illustrate_and_export_emit_events(tmp_path):
+    with FakeInferenceServer() as server, collect_metrics() as recorded:
+        book = Book(
+            title="Test Book",
+            pages=["A cat sat.", "A dog ran."],
+            prompt_backend=server.prompt_backend(),
+            image_backend=server.image_backend(),
+        )
+        book.illustrate(save_dir=tmp_path / "images", max_workers=2)
+        book.export(tmp_path / "book.pptx")
+        book.create_preview(executor="thread")
+
+    summary = recorded.summary()
+    assert summary["prompt.chat"]["count"] == 1
+    assert recorded.by_name("prompt.chat")[0].attributes["pages"] == 3
+    assert summary["image.generate"]["count"] == 3
+    assert summary["illustrate.page"]["count"] == 3
+    assert all(event.attributes["ok"] for event in recorded.by_name("illustrate.page"))
+    assert recorded.total("image.generate", "bytes") == sum(
+        path.stat().st_size for path in (tmp_path / "images").iterdir()
+    )
+    (export,) = recorded.by_name("export")
+    assert export.attributes["bytes"] == (tmp_path / "book.pptx").stat().st_size
+    assert recorded.by_name("create_preview")[0].attributes["rendered"] == 3
+    assert summary["export"]["max"] > 0
+
+    # Nothing is recorded once the block has exited
+    book.export(tmp_path / "again.pptx")
+    assert len(recorded.by_name("export")) == 1
+
+
+def test_prompt_events_name_their_page(tmp_path):
+    with FakeInferenceServer() as server, collect_metrics() as recorded:
+        book = Book(
+            title="Test Book",
+            pages=["A cat sat.", "A dog ran."],
+            prompt_backend=server.prompt_backend(),
+            image_backend=server.image_backend(),
+            prompt_cache=False,
+        )
+        book.illustrate(save_dir=tmp_path, batch_prompts=False, image_cache=False)
+
+    pages = sorted(event.attributes["page"] for event in recorded.by_name("prompt.chat"))
+    assert pages == ["page_1", "page_2", "title"]
+
+
+def test_span_records_errors_and_listener_failures_are_isolated(capsys):
+    def broken_listener(event):
+        raise RuntimeError("listener bug")
+
+    metrics.add_listener(broken_listener)
+    try:
+        with collect_metrics() as recorded:
+            with pytest.raises(ValueError):
+                with metrics.span("work", page="page_1"):
+                    raise ValueError("boom")
+    finally:
+        metrics.remove_listener(broken_listener)
+
+    (event,) = recorded.events
+    assert event.name == "work"
+    assert event.attributes == {"page": "page_1", "error": "ValueError"}
+    assert event.duration >= 0
+    assert "listener bug" in capsys.readouterr().out
+
+
+def test_retries_are_reported(monkeypatch):
+    fake_session = mock.Mock()
+    fake_session.post.side_effect = [
+        mock.Mock(status_code=503, headers={"Retry-After": "1"}),
+        mock.Mock(status_code=200),
+    ]
+    monkeypatch.setattr(session, "get_session", lambda: fake_session)
+    monkeypatch.setattr(session.time, "sleep", lambda delay: None)
+
+    with collect_metrics() as recorded:
+        session.post_with_retry("https://example.com")
+
+    (retry,) = recorded.by_name("http.retry")
+    assert retry.attributes == {
+        "url": "https://example.com",
+        "attempt": 1,
+        "delay": 1.0,
+        "reason": "HTTP 503",
+    }
+
+
+def test_opentelemetry_exporter(monkeypatch):
+    # A tracer that is passed in doesn't need opentelemetry-api to be installed
+    monkeypatch.setitem(sys.modules, "opentelemetry", None)
+    tracer = mock.Mock()
+    exporter = OpenTelemetryExporter(tracer=tracer)
+    attributes = {"page": "title", "size": (1, 2), "bytes": None}
+    exporter(Event("image.generate", start=100.0, duration=2.5, attributes=attributes))
+
+    tracer.start_span.assert_called_once_with(
+        "drawbook.image.generate",
+        start_time=100_000_000_000,
+        attributes={"page": "title", "size": "(1, 2)"},
+    )
+    tracer.start_span.return_value.end.assert_called_once_with(end_time=102_500_000_000)
@@ -0,0 +1,25 @@
+import io
+import re
+
+from PIL import Image
+
+from drawbook.pdf import PDFWriter
+
+
+def test_pdf_writer_structure():
+    buffer = io.BytesIO()
+    with PDFWriter(buffer, compression="flate") as pdf:
+        pdf.add_page(Image.new("RGB", (192, 108), "red"), dpi=192)
+        pdf.add_page(Image.new("L", (96, 54), "white"), dpi=96)
+    data = buffer.getvalue()
+
+    assert data.startswith(b"%PDF-1.4")
+    assert data.rstrip().endswith(b"%%EOF")
+    assert b"/Count 2" in data
+    assert data.count(b"/MediaBox [0 0 72.0000 40.5000]") == 2
+
+    # Every cross-reference entry points at the start of its object
+    xref_position = int(re.search(rb"startxref\n(\d+)", data).group(1))
+    offsets = re.findall(rb"(\d{10}) 00000 n", data[xref_position:])
+    for obj_id, offset in enumerate(offsets, start=1):
+        assert data[int(offset) :].startswith(b"%d 0 obj" % obj_id)
@@ -0,0 +1,88 @@
+import multiprocessing
+import time
+from unittest import mock
+
+from drawbook import ratelimit, session
+from drawbook.ratelimit import FileTokenBucket, TokenBucket, set_rate_limit
+from drawbook.session import post_with_retry
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(7):
+        bucket.acquire()
+    # Two requests go through right away, the other five are spaced 20ms apart
+    assert 0.08 <= time.monotonic() - start < 0.5
+
+    slow = TokenBucket(rate=1)
+    assert slow.acquire(timeout=0)
+    assert not slow.acquire(timeout=0.01)
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=1000, burst=10)
+    bucket.pause(0.1)
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def _acquire_many(path, count, queue):
+    bucket = FileTokenBucket(rate=40, burst=1, path=path)
+    for _ in range(count):
+        bucket.acquire()
+        queue.put(time.time())
+
+
+def test_file_token_bucket_is_shared_between_processes(tmp_path):
+    path = tmp_path / "image.bucket"
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    processes = [
+        context.Process(target=_acquire_many, args=(path, 5, queue)) for _ in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+    times = sorted(queue.get(timeout=5) for _ in range(10))
+    # Ten requests at 40 per second take at least 9 intervals of 25ms in total
+    assert times[-1] - times[0] >= 0.2
+
+
+def test_file_token_bucket_waits_off_the_event_loop(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    bucket = FileTokenBucket(rate=1000, burst=1, path=tmp_path / "image.bucket")
+    threads = []
+    take = bucket._take
+
+    def recording_take(now):
+        threads.append(threading.current_thread())
+        return take(now)
+
+    monkeypatch.setattr(bucket, "_take", recording_take)
+    asyncio.run(bucket.aacquire())
+    assert threads and threading.main_thread() not in threads
+
+
+def test_post_with_retry_waits_for_limiter_and_pauses_on_429(monkeypatch):
+    limiter = set_rate_limit("image", requests_per_minute=6000)
+    fake_session = mock.Mock()
+    fake_session.post.side_effect = [
+        mock.Mock(status_code=429, headers={"Retry-After": "2"}),
+        mock.Mock(status_code=200),
+    ]
+    monkeypatch.setattr(session, "get_session", lambda: fake_session)
+    monkeypatch.setattr(session.time, "sleep", lambda delay: None)
+
+    with mock.patch.object(limiter, "pause", wraps=limiter.pause) as pause, \
+            mock.patch.object(limiter, "acquire", wraps=limiter.acquire) as acquire:
+        response = post_with_retry("https://example.com", endpoint="image")
+
+    assert response.status_code == 200
+    assert acquire.call_count == 2
+    pause.assert_called_once_with(2.0)
+    assert ratelimit.get_rate_limit("chat") is None
@@ -0,0 +1,44 @@
+import os
+
+from PIL import Image
+
+from drawbook.render import IllustrationCache, get_font
+
+
+def test_get_font_is_cached_and_always_resolves():
+    font = get_font(48)
+    assert font is get_font(48)
+    assert font.getbbox("Hello")[2] > 0
+
+
+def test_illustration_cache_reloads_changed_files(tmp_path):
+    path = tmp_path / "page_1.png"
+    Image.new("RGB", (32, 32), "red").save(path)
+    cache = IllustrationCache(max_entries=2)
+
+    first = cache.get(path, (8, 8))
+    assert first.size == (8, 8)
+    assert cache.get(path, (8, 8)) is first
+
+    Image.new("RGB", (32, 32), "blue").save(path)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    second = cache.get(path, (8, 8))
+    assert second is not first
+    assert second.getpixel((0, 0)) == (0, 0, 255)
+
+
+def test_render_pages_in_parallel_matches_serial(tmp_path):
+    from drawbook.render import render_pages
+
+    illustration = tmp_path / "page_1.png"
+    Image.new("RGB", (32, 32), "red").save(illustration)
+    specs = [
+        ("title", "Test Book", "Test Author", None),
+        ("content", 1, "Page 1", str(illustration)),
+        ("content", 2, "Page 2", None),
+    ]
+
+    serial = list(render_pages(specs))
+    for executor in ("process", "thread"):
+        parallel = list(render_pages(specs, max_workers=2, executor=executor))
+        assert [page.tobytes() for page in parallel] == [page.tobytes() for page in serial]
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from drawbook import session
+from drawbook.session import RetryPolicy, post_with_retry
+
+
+def _response(status_code, headers=None, body=None):
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.json.return_value = body or {}
+    return response
+
+
+def test_post_with_retry_honors_server_delays(monkeypatch):
+    responses = [
+        _response(503, body={"error": "Model is loading", "estimated_time": 7.5}),
+        _response(429, headers={"Retry-After": "3"}),
+        _response(200),
+    ]
+    fake_session = mock.Mock()
+    fake_session.post.side_effect = responses
+    sleeps, retries = [], []
+    monkeypatch.setattr(session, "get_session", lambda: fake_session)
+    monkeypatch.setattr(session.time, "sleep", sleeps.append)
+
+    response = post_with_retry(
+        "https://example.com",
+        json={"inputs": "A cat"},
+        on_retry=lambda attempt, delay, reason: retries.append((attempt, reason)),
+    )
+
+    assert response.status_code == 200
+    assert sleeps == [7.5, 3.0]
+    assert retries == [(1, "HTTP 503"), (2, "HTTP 429")]
+
+
+def test_post_with_retry_gives_up(monkeypatch):
+    fake_session = mock.Mock()
+    fake_session.post.return_value = _response(500)
+    sleeps = []
+    monkeypatch.setattr(session, "get_session", lambda: fake_session)
+    monkeypatch.setattr(session.time, "sleep", sleeps.append)
+
+    policy = RetryPolicy(max_retries=2, backoff_base=1.0, backoff_max=1.5)
+    response = post_with_retry("https://example.com", policy=policy)
+
+    assert response.status_code == 500
+    assert fake_session.post.call_count == 3
+    assert all(0 <= delay <= 1.5 for delay in sleeps) and len(sleeps) == 2
+
+
+def test_apost_with_retry(monkeypatch):
+    import asyncio
+    import httpx
+    from drawbook.session import apost_with_retry
+
+    statuses = [503, 429, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), headers={"Retry-After": "0"})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await apost_with_retry(
+                client,
+                "https://example.com",
+                json={"inputs": "A cat"},
+                on_retry=lambda attempt, delay, reason: retries.append(reason),
+            )
+
+    retries = []
+    response = asyncio.run(main())
+    assert response.status_code == 200
+    assert retries == ["HTTP 503", "HTTP 429"]
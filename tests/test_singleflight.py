@@ -0,0 +1,168 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from drawbook import Book
+from drawbook.metrics import collect_metrics
+from drawbook.singleflight import SingleFlight
+from drawbook.testing import FakeInferenceServer
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight("test")
+    calls = []
+    release = threading.Event()
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    with collect_metrics() as metrics, ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flight.do, "key", fn) for _ in range(4)]
+        time.sleep(0.1)
+        release.set()
+        assert [future.result() for future in futures] == ["result"] * 4
+
+    assert len(calls) == 1
+    assert len(metrics.by_name("singleflight.shared")) == 3
+    # Calls made after the first one finished run again
+    assert flight.do("key", lambda: "again") == "again"
+
+
+def test_errors_are_shared_with_waiting_callers():
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(flight.do, "key", fn) for _ in range(2)]
+        time.sleep(0.1)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match="boom"):
+                future.result()
+
+
+def test_async_calls_share_one_result_and_survive_cancellation():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        results = await asyncio.gather(*[flight.ado("key", fn) for _ in range(5)])
+        assert results == [1] * 5
+
+        # A follower of a cancelled call starts its own
+        leader = asyncio.ensure_future(flight.ado("other", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.ado("other", fn))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == 3
+
+    asyncio.run(main())
+    assert len(calls) == 3
+
+
+def _do_with_lock(lock_dir, marker, queue):
+    flight = SingleFlight("test", lock_dir=lock_dir)
+
+    def fn():
+        time.sleep(0.2)
+        marker.write_text("done")
+        return "sent"
+
+    queue.put(flight.do("key", fn, check=lambda: "cached" if marker.exists() else None))
+
+
+def test_lock_dir_coalesces_across_processes(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    processes = [
+        context.Process(target=_do_with_lock, args=(tmp_path / "locks", tmp_path / "marker", queue))
+        for _ in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+    assert sorted(queue.get(timeout=5) for _ in processes) == ["cached", "sent"]
+
+
+def _do_keys_with_lock(lock_dir, directory, keys):
+    flight = SingleFlight("test", lock_dir=lock_dir)
+
+    def do(i, key):
+        marker = directory / f"{key}.done"
+
+        def fn():
+            # Calls finish at different times, releasing their locks one by one
+            time.sleep(0.1 * (i + 1))
+            with open(directory / f"{key}.runs", "a") as f:
+                f.write("x")
+            marker.write_text("done")
+            return "sent"
+
+        flight.do(key, fn, check=lambda: "cached" if marker.exists() else None)
+
+    with ThreadPoolExecutor(max_workers=len(keys)) as executor:
+        list(executor.map(do, range(len(keys)), keys))
+
+
+def test_lock_dir_coalesces_threads_across_processes(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    keys = [f"key{i}" for i in range(4)]
+    processes = [
+        context.Process(target=_do_keys_with_lock, args=(tmp_path / "locks", tmp_path, keys))
+        for _ in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+    # Releasing one key's lock must not release the others held by the same process
+    assert [(tmp_path / f"{key}.runs").read_text() for key in keys] == ["x"] * 4
+
+
+def test_pages_with_the_same_text_share_requests(tmp_path):
+    with FakeInferenceServer(image_latency=0.1) as server:
+        book = Book(
+            title="Test Book",
+            pages=["The end."] * 4,
+            title_illustration=False,
+            prompt_backend=server.prompt_backend(),
+            image_backend=server.image_backend(),
+        )
+        book.illustrate(save_dir=tmp_path, max_workers=4, image_cache=False)
+
+        assert server.image_requests == 1
+        assert len(set(book.illustrations)) == 4
+        for path in book.illustrations[1:]:
+            with open(path, "rb") as f, open(book.illustrations[0], "rb") as first:
+                assert f.read() == first.read()
+
+
+def test_prompt_lookups_are_counted_once(tmp_path, monkeypatch):
+    from drawbook.singleflight import enable_cross_process
+
+    # Re-checks happen on both sides of the cross-process lock
+    enable_cross_process(tmp_path / "locks")
+    book = Book(title="Test Book", pages=["hello"])
+    monkeypatch.setattr(book, "_chat", lambda user_prompt, **kwargs: "A wave")
+
+    assert book._get_illustration_prompt("hello") == "A wave"
+    assert book.prompt_cache.stats() == {"hits": 0, "misses": 1}
+    assert book._get_illustration_prompt("hello") == "A wave"
+    assert book.prompt_cache.stats() == {"hits": 1, "misses": 1}
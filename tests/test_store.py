@@ -0,0 +1,52 @@
+from PIL import Image
+
+from drawbook.store import PreviewStore
+
+
+def _page(color):
+    return Image.new("RGB", (16, 9), color)
+
+
+def test_preview_store_spills_to_disk(tmp_path):
+    store = PreviewStore(max_in_memory=2, directory=tmp_path)
+    store.extend([_page("red"), None, _page("green"), _page("blue")])
+
+    assert len(store) == 4
+    assert store.in_memory() == 2
+    assert len(list(tmp_path.glob("*.png"))) == 1
+    assert store[0].getpixel((0, 0)) == (255, 0, 0)
+    assert store[1] is None
+    assert not store.has_page(1)
+    assert store.in_memory() == 2
+
+
+def test_preview_store_replaces_and_deletes_pages(tmp_path):
+    store = PreviewStore(max_in_memory=1, directory=tmp_path)
+    store.extend([_page("red"), _page("green"), _page("blue")])
+    assert store.paths()[1].exists()
+
+    store[0] = _page("white")
+    del store[1:]
+
+    assert len(store) == 1
+    assert store[0].getpixel((0, 0)) == (255, 255, 255)
+    assert list(tmp_path.glob("*.png")) == []  # Only the in-memory page is left
+    path = store.path(0)
+    assert list(tmp_path.glob("*.png")) == [path]
+
+
+def test_preview_store_thumbnails_follow_page_versions(tmp_path):
+    store = PreviewStore(directory=tmp_path)
+    store.extend([Image.new("RGB", (1920, 1080), "red"), None])
+
+    thumbnail = store.thumbnail(0)
+    assert store.thumbnail(0) == thumbnail
+    assert store.thumbnails()[1] is None
+    with Image.open(thumbnail) as image:
+        assert image.format == "WEBP"
+        assert image.size == (480, 270)
+    assert thumbnail.stat().st_size < 10_000
+
+    store[0] = Image.new("RGB", (1920, 1080), "blue")
+    assert not thumbnail.exists()
+    assert store.thumbnail(0, image_format="jpeg").suffix == ".jpg"